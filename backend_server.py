@@ -3,22 +3,22 @@ OKTrix Backend Server
 Flask + SocketIO server for Electron app
 """
 
-from flask import Flask
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
-import cv2
-import base64
-import numpy as np
+import atexit
+import os
 import sys
 import time
 import threading
 
+from core.metrics import PipelineMetrics
+
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
-# Import gesture engine
-from core.gesture_engine import GestureEngine
+STARTED_AT = time.perf_counter()
 
 app = Flask(__name__)
 CORS(app)
@@ -27,128 +27,435 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 gesture_engine = None
 camera_active = False
 
+# Startup phases pushed to clients as 'backend_status':
+#   server - Socket.IO is accepting connections
+#   model  - vision stack imported and GestureEngine (MediaPipe graph) built
+#   camera - frame source open and frames flowing
+backend_status = {'server': False, 'model': False, 'camera': False}
+pipeline_ready = threading.Event()
+
+# Warm-up and per-session latency (ms), sent along with backend_status
+startup_metrics = {}
+
+# Kept across stop/start so a restart doesn't respawn and reload the model
+inference_worker = None
+
+# Frame source spec, e.g. "camera", "video:clip.mp4", "landmarks:trace.jsonl".
+# Several comma-separated specs run one worker process per camera.
+FRAME_SOURCE = os.environ.get('OKTRIX_SOURCE', 'camera')
+MAX_HANDS = int(os.environ.get('OKTRIX_MAX_HANDS', '1'))
+# "process" runs inference in a worker process fed through shared memory,
+# "inline" runs it on the camera thread
+INFERENCE_MODE = os.environ.get('OKTRIX_INFERENCE', 'process')
+# Landmark smoothing before gesture logic: one_euro, kalman or none
+LANDMARK_FILTER = os.environ.get('OKTRIX_LANDMARK_FILTER', 'one_euro')
+# Directory for one binary landmark trace per tracking session (off if unset)
+RECORD_DIR = os.environ.get('OKTRIX_RECORD')
+# Gestures, cooldowns and player keys come from OKTRIX_GESTURE_CONFIG
+# (default config/gestures.json); edits apply while running
+config_watcher = None
+
+# Preview protocol negotiated per client:
+#   image     - JPEG tracking frame as a data URL (default, legacy clients)
+#   landmarks - 21 normalized (x, y) points packed as float32, drawn client-side
+#   none      - state only, no preview payload
+STREAM_MODES = ('image', 'landmarks', 'none')
+DEFAULT_STREAM_MODE = 'image'
+stream_modes = {}
+
+# Preview rate is capped separately from the analysis rate (camera fps)
+PREVIEW_FPS = float(os.environ.get('OKTRIX_PREVIEW_FPS', '20'))
+preview_throttle = None
+
+# Per-stage timings, pushed as 'metrics_update' every METRICS_INTERVAL
+# seconds and served at /metrics
+METRICS_INTERVAL = float(os.environ.get('OKTRIX_METRICS_INTERVAL', '1.0'))
+metrics = PipelineMetrics()
+
+
+def status_payload():
+    elapsed = time.perf_counter() - STARTED_AT
+    return dict(backend_status, elapsed=round(elapsed, 3), metrics=dict(startup_metrics))
+
+
+def set_phase(phase, value=True):
+    """Update a startup phase and tell every client"""
+    backend_status[phase] = value
+    if value:
+        print(f"Phase {phase} ready ({time.perf_counter() - STARTED_AT:.2f}s)", flush=True)
+    socketio.emit('backend_status', status_payload())
+
 
-def create_tracking_frame(result):
-    """Create black frame with mint landmarks and glow"""
-    h, w = 480, 640
-    frame = np.zeros((h, w, 3), dtype=np.uint8)
+def record_metric(name, seconds):
+    """Store a startup/session latency and push it to clients"""
+    startup_metrics[name] = round(seconds * 1000.0, 1)
+    print(f"{name}: {startup_metrics[name]} ms", flush=True)
+    socketio.emit('backend_status', status_payload())
+
+
+def get_inference_worker():
+    """Start the inference process once and keep it for later sessions"""
+    global inference_worker
+    if inference_worker is not None and not inference_worker.is_alive():
+        # Died since the last session; start a fresh one
+        inference_worker.stop()
+        inference_worker = None
+    if inference_worker is None:
+        inference_worker = InferenceWorker(max_hands=MAX_HANDS).start()
+        atexit.register(inference_worker.stop)
+    return inference_worker
+
+
+def load_pipeline():
+    """
+    Import the vision stack and build the engine off the startup path
     
-    if not result['hand_detected']:
-        return frame
+    cv2, mediapipe and the media backend take seconds to import; the
+    server reports ready before any of it is loaded.
+    """
+    global gesture_engine, preview_throttle, config_watcher
+    global GestureEngine, FrameGrabber, open_frame_source, MultiCameraPipeline, InferenceWorker
+    global ExposureController
+    global PreviewThrottle, create_tracking_frame, encode_empty_frame, encode_frame, pack_hands
     
     try:
-        hand_data = gesture_engine.hand_tracker.process_frame(
-            cv2.resize(result['annotated_frame'], (w, h))
-        )
+        from core.gesture_engine import GestureEngine
+        from core.gesture_config import GestureConfigWatcher
+        from core.frame_grabber import FrameGrabber
+        from core.frame_source import open_frame_source
+        from core.environment import ExposureController
+        from core.camera_worker import MultiCameraPipeline
+        from core.inference_worker import InferenceWorker
+        from core.preview import (PreviewThrottle, create_tracking_frame, encode_empty_frame,
+                                  encode_frame, pack_hands)
         
-        if hand_data['detected'] and hand_data['landmarks']:
-            landmarks = hand_data['landmarks']
-            
-            # Connections
-            connections = [
-                (0,1),(1,2),(2,3),(3,4), (0,5),(5,6),(6,7),(7,8),
-                (0,9),(9,10),(10,11),(11,12), (0,13),(13,14),(14,15),(15,16),
-                (0,17),(17,18),(18,19),(19,20), (5,9),(9,13),(13,17)
-            ]
-            
-            color = (192, 211, 125)  # Mint green BGR
-            
-            # Draw connections with glow
-            for start_idx, end_idx in connections:
-                s = landmarks[start_idx]
-                e = landmarks[end_idx]
-                sp = (int(s[0]*w), int(s[1]*h))
-                ep = (int(e[0]*w), int(e[1]*h))
-                
-                for thick, alpha in [(8,30), (5,60), (3,120), (2,255)]:
-                    c = tuple(int(x*alpha/255) for x in color)
-                    cv2.line(frame, sp, ep, c, thick)
-            
-            # Draw points with glow
-            for idx, lm in enumerate(landmarks):
-                center = (int(lm[0]*w), int(lm[1]*h))
-                r = 8 if idx == 0 else 5
-                
-                for radius, alpha in [(r*3,20), (r*2,40), (r,255)]:
-                    c = tuple(int(x*alpha/255) for x in color)
-                    cv2.circle(frame, center, radius, c, -1)
-    
+        preview_throttle = PreviewThrottle(max_fps=PREVIEW_FPS)
+        if gesture_engine is None:
+            inference = inference_in_server()
+            gesture_engine = GestureEngine(max_hands=MAX_HANDS, landmark_filter=LANDMARK_FILTER,
+                                           metrics=metrics, inference=inference)
+            if inference:
+                record_metric('warm_up', gesture_engine.warm_up())
+        if config_watcher is None:
+            config_watcher = GestureConfigWatcher(gesture_engine.config.path,
+                                                  gesture_engine.apply_config).start()
+            atexit.register(config_watcher.stop)
+        
+        # The inference process loads and warms up its own model
+        if INFERENCE_MODE == 'process' and needs_inference():
+            t0 = time.perf_counter()
+            worker = get_inference_worker()
+            if not worker.wait_ready(timeout=60.0):
+                print("Inference worker failed to start", flush=True)
+                worker.stop()
+                return
+            record_metric('worker_ready', time.perf_counter() - t0)
+        set_phase('model')
     except Exception as e:
-        print(f"Draw error: {e}")
-    
-    return frame
+        print(f"Pipeline failed to load: {e}", flush=True)
+    finally:
+        pipeline_ready.set()
+
+
+def inference_in_server():
+    """
+    Whether hand inference runs in this process
+
+    Only inline mode with a single image source does; otherwise the
+    inference worker or camera processes build and warm up their own
+    MediaPipe graph, and recorded landmarks need none.
+    """
+    return INFERENCE_MODE == 'inline' and needs_inference()
+
+
+def needs_inference():
+    """Whether FRAME_SOURCE is a single source of images (not landmarks)"""
+    if ',' in FRAME_SOURCE:
+        return False
+    kind = FRAME_SOURCE.split(':')[0]
+    return not (kind in ('landmarks', 'trace') or
+                FRAME_SOURCE.lower().endswith(('.jsonl', '.json', '.oktrace')))
 
 
-def encode_frame(frame):
-    _, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-    return f"data:image/jpeg;base64,{base64.b64encode(buf).decode()}"
+def stream_room(mode):
+    return f"stream_{mode}"
+
+
+def publish_result(result, preview=True):
+    """Emit a tracking_update to every client in the format it asked for"""
+    # Get activation progress
+    activation_progress = gesture_engine.get_activation_progress()
+    
+    # Prepare data
+    data = {
+        'hand_detected': result['hand_detected'],
+        'system_active': result['system_active'],
+        'current_gesture': result['current_gesture'],
+        'activation_progress': activation_progress
+    }
+    if result.get('play_pause_display'):
+        data['play_pause_display'] = result['play_pause_display']
+    
+    if not preview:
+        with metrics.time('emit'):
+            socketio.emit('tracking_update', data)
+        return
+    
+    decision = preview_throttle.decide(result, activation_progress)
+    if decision is None:
+        return
+    
+    # Only pay for the preview formats somebody asked for
+    active_modes = set(stream_modes.values())
+    
+    if decision == PreviewThrottle.STATUS:
+        # No hand: image clients get one cached black frame to clear their
+        # canvas, everyone else a tiny status event
+        t0 = time.perf_counter()
+        if 'image' in active_modes:
+            socketio.emit('tracking_update',
+                          dict(data, tracking_frame=encode_empty_frame()),
+                          to=stream_room('image'))
+        for mode in ('landmarks', 'none'):
+            if mode in active_modes:
+                socketio.emit('hand_status', data, to=stream_room(mode))
+        metrics.record('emit', time.perf_counter() - t0)
+        return
+    
+    emit_time = 0.0
+    if 'image' in active_modes:
+        with metrics.time('render'):
+            tracking_frame = create_tracking_frame(result)
+        with metrics.time('encode'):
+            tracking_frame = encode_frame(tracking_frame)
+        t0 = time.perf_counter()
+        socketio.emit('tracking_update',
+                      dict(data, tracking_frame=tracking_frame),
+                      to=stream_room('image'))
+        emit_time += time.perf_counter() - t0
+    
+    t0 = time.perf_counter()
+    if 'landmarks' in active_modes:
+        socketio.emit('tracking_update',
+                      dict(data,
+                           landmarks=pack_hands(result['hands']),
+                           handedness=result['handedness']),
+                      to=stream_room('landmarks'))
+    
+    if 'none' in active_modes:
+        socketio.emit('tracking_update', data, to=stream_room('none'))
+    metrics.record('emit', emit_time + time.perf_counter() - t0)
 
 
-def camera_loop():
+def camera_loop(requested_at):
+    """One tracking session, recorded to RECORD_DIR when set"""
     global camera_active, gesture_engine
     
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    # First start may arrive while the model is still loading
+    pipeline_ready.wait()
+    if gesture_engine is None or not backend_status['model']:
+        camera_active = False
+        return
+    
+    # Same engine as last session; only per-session tracking state resets
+    gesture_engine.reset_tracking()
+    if RECORD_DIR:
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        gesture_engine.start_recording(
+            os.path.join(RECORD_DIR, time.strftime('session-%Y%m%d-%H%M%S.oktrace')))
+    try:
+        run_camera_session(requested_at)
+    finally:
+        gesture_engine.stop_recording()
+
+
+def run_camera_session(requested_at):
+    """Open the frame source(s) and run gesture logic until stop_tracking"""
+    global camera_active
+    
+    first_frame = True
+    first_landmark = True
     
-    if not cap.isOpened():
-        print("Camera failed")
+    specs = [spec.strip() for spec in FRAME_SOURCE.split(',') if spec.strip()]
+    if len(specs) > 1:
+        multi_camera_loop(specs)
         return
     
-    print("Camera started")
+    source = open_frame_source(FRAME_SOURCE)
+    
+    if not source.isOpened():
+        print(f"Frame source failed: {FRAME_SOURCE}")
+        camera_active = False
+        return
+    
+    grabber = FrameGrabber(source, metrics=metrics).start()
+    print(f"Camera started ({FRAME_SOURCE})")
+    set_phase('camera')
+    
+    # Bad lighting nudges the camera's exposure and gain
+    exposure = None if source.provides_landmarks else ExposureController(grabber)
+    
+    worker = None
+    if INFERENCE_MODE == 'process' and not source.provides_landmarks:
+        worker = get_inference_worker()
+        worker.reset()
+        threading.Thread(target=feed_inference_worker, args=(grabber, worker), daemon=True).start()
     
     while camera_active:
         try:
-            ret, frame = cap.read()
-            if not ret:
-                continue
-            frame = cv2.flip(frame, 1)
-            # Process frame
-            result = gesture_engine.process_frame(frame)
+            timings = {}
+            if worker is not None:
+                # Inference runs in the worker process, this thread only
+                # does gesture logic and publishing
+                item = worker.read(timeout=1.0)
+                if item is None:
+                    if not worker.is_alive():
+                        print("Inference worker exited, stopping tracking")
+                        camera_active = False
+                    continue
+                timestamp, hand_data, env_quality, worker_timings = item
+                timings.update(worker_timings)
+                result = gesture_engine.process_hand_data(hand_data, env_quality, timings,
+                                                          timestamp=timestamp)
+            else:
+                ret, frame, timestamp = grabber.read(timeout=1.0)
+                if not ret:
+                    continue
+                # Process frame
+                if source.provides_landmarks:
+                    result = gesture_engine.process_hand_data(frame, timings=timings)
+                else:
+                    result = gesture_engine.process_frame(frame, timings,
+                                                          timestamp=timestamp, annotate=False)
+            metrics.record_timings(timings)
+            if exposure is not None:
+                exposure.update(result['environment_quality'], gesture_engine.clock)
             
-            # Create tracking frame
-            tracking_frame = create_tracking_frame(result)
-            
-            # Get activation progress
-            activation_progress = gesture_engine.get_activation_progress()
+            if first_frame:
+                first_frame = False
+                record_metric('time_to_first_frame', time.perf_counter() - requested_at)
+            if first_landmark and result['hand_detected']:
+                first_landmark = False
+                record_metric('time_to_first_landmark', time.perf_counter() - requested_at)
             
-            # Prepare data
-            data = {
-                'tracking_frame': encode_frame(tracking_frame),
-                'hand_detected': result['hand_detected'],
-                'system_active': result['system_active'],
-                'current_gesture': result['current_gesture'],
-                'activation_progress': activation_progress
-            }
-            if result.get('play_pause_display'):
-                data['play_pause_display'] = result['play_pause_display']
+            publish_result(result)
             
+        except Exception as e:
+            metrics.increment('loop_errors')
+            print(f"Loop error: {e}")
+            continue
+    
+    grabber.stop()
+    if exposure is not None:
+        exposure.restore()
+    source.release()
+    set_phase('camera', False)
+    
+    stats = grabber.get_stats()
+    print(f"Stopped (captured {stats['frames_captured']}, dropped {stats['frames_dropped']})")
 
-            socketio.emit('tracking_update', data)
+
+def feed_inference_worker(grabber, worker):
+    """Hand the freshest frames to the inference process"""
+    while camera_active:
+        ret, frame, timestamp = grabber.read(timeout=1.0)
+        if ret:
+            worker.submit(frame, timestamp)
+
+
+def multi_camera_loop(specs):
+    """Gesture logic over results from one inference process per camera"""
+    pipeline = MultiCameraPipeline(specs, max_hands=MAX_HANDS).start()
+    print(f"Cameras started ({len(specs)})")
+    set_phase('camera')
+    
+    while camera_active:
+        try:
+            message = pipeline.read(timeout=1.0)
+            if message is None:
+                continue
+            
+            stream_id, timestamp, hand_data, env_quality = message
+            timings = {}
+            result = gesture_engine.process_hand_data(hand_data, env_quality, timings,
+                                                      stream_id=stream_id, timestamp=timestamp)
+            metrics.record_timings(timings)
+            
+            # The preview follows the first camera; others only report gestures
+            if stream_id == 0:
+                publish_result(result)
+            elif result['current_gesture']:
+                publish_result(result, preview=False)
             
         except Exception as e:
+            metrics.increment('loop_errors')
             print(f"Loop error: {e}")
             continue
     
-    cap.release()
-    print("Stopped")
+    pipeline.stop()
+    set_phase('camera', False)
+    print(f"Stopped (results per camera: {pipeline.frames_received})")
+
+
+def publish_metrics():
+    """Push the metrics snapshot to clients while any are connected"""
+    while True:
+        socketio.sleep(METRICS_INTERVAL)
+        if stream_modes:
+            socketio.emit('metrics_update', metrics.snapshot())
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text format; ?format=json for the metrics_update payload"""
+    if request.args.get('format') == 'json':
+        return jsonify(metrics.snapshot())
+    return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
 
 
 @socketio.on('connect')
 def handle_connect():
+    stream_modes[request.sid] = DEFAULT_STREAM_MODE
+    join_room(stream_room(DEFAULT_STREAM_MODE))
+    # New client needs the current state even if nothing is changing
+    if preview_throttle is not None:
+        preview_throttle.invalidate()
+    emit('backend_status', status_payload())
     print("Connected")
 
 
+@socketio.on('disconnect')
+def handle_disconnect():
+    stream_modes.pop(request.sid, None)
+
+
+@socketio.on('set_stream_mode')
+def handle_stream_mode(data):
+    mode = (data or {}).get('mode', DEFAULT_STREAM_MODE)
+    if mode not in STREAM_MODES:
+        emit('stream_mode', {'mode': stream_modes.get(request.sid), 'error': f"Unknown mode: {mode}"})
+        return
+    
+    previous = stream_modes.get(request.sid)
+    if previous and previous != mode:
+        leave_room(stream_room(previous))
+    join_room(stream_room(mode))
+    stream_modes[request.sid] = mode
+    if preview_throttle is not None:
+        preview_throttle.invalidate()
+    
+    emit('stream_mode', {'mode': mode})
+    print(f"Stream mode: {mode}")
+
+
 @socketio.on('start_tracking')
 def handle_start():
     global camera_active, gesture_engine
     
     if not camera_active:
-        if gesture_engine is None:
-            gesture_engine = GestureEngine()
-        
+        # The engine is built by load_pipeline(); camera_loop waits for it
         camera_active = True
-        threading.Thread(target=camera_loop, daemon=True).start()
+        threading.Thread(target=camera_loop, args=(time.perf_counter(),), daemon=True).start()
         print("Started")
 
 
@@ -171,5 +478,11 @@ def handle_toggle(data):
 
 if __name__ == '__main__':
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 5847
-    print("Backend ready")
+    
+    threading.Thread(target=load_pipeline, daemon=True).start()
+    if METRICS_INTERVAL > 0:
+        socketio.start_background_task(publish_metrics)
+    
+    backend_status['server'] = True
+    print(f"Backend ready ({time.perf_counter() - STARTED_AT:.2f}s)", flush=True)
     socketio.run(app, host='127.0.0.1', port=port, debug=False, use_reloader=False, allow_unsafe_werkzeug=True)
@@ -0,0 +1,328 @@
+"""
+OKTrix Pipeline Benchmark
+Replays recorded clips or landmark traces through the gesture pipeline
+flat out and reports throughput and per-stage latency
+
+Usage:
+    python benchmarks/bench_pipeline.py clips/swipes.mp4 traces/ok.jsonl
+    python benchmarks/bench_pipeline.py video:clip.mp4 --json bench.json --budget-ms 50
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.frame_source import open_frame_source
+from core.gesture_engine import GestureEngine
+from core.preview import (HAND_CONNECTIONS, LINE_GLOW, MINT, POINT_GLOW, PREVIEW_SIZE,
+                          create_tracking_frame, encode_frame)
+
+
+STAGES = (
+    'color_conversion',
+    'inference',
+    'annotate',
+    'environment',
+    'gesture_logic',
+    'render',
+    'render_reference',
+    'encode',
+    'total'
+)
+
+
+class NullMediaController:
+    """
+    Stand-in for MediaController that only counts commands
+    """
+
+    def __init__(self):
+        self.commands = {}
+
+    def execute_gesture(self, gesture_name, count=1, magnitude=None):
+        self.commands[gesture_name] = self.commands.get(gesture_name, 0) + count
+        return True
+
+    def get_next_play_pause_display(self):
+        return "PLAY"
+
+
+def reference_tracking_frame(result):
+    """
+    Preview drawn one primitive at a time, as before GlowRenderer; used to
+    check the cached renderer's output and measure what it saves
+    """
+    w, h = PREVIEW_SIZE
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    if not result['hand_detected']:
+        return frame
+
+    hands = result.get('hands') or [{'landmarks': result['landmarks']}]
+    for hand in hands:
+        landmarks = hand['landmarks']
+        for start_idx, end_idx in HAND_CONNECTIONS:
+            s = landmarks[start_idx]
+            e = landmarks[end_idx]
+            sp = (int(float(s[0])*w), int(float(s[1])*h))
+            ep = (int(float(e[0])*w), int(float(e[1])*h))
+            for thick, alpha in LINE_GLOW:
+                c = tuple(int(x*alpha/255) for x in MINT)
+                cv2.line(frame, sp, ep, c, thick)
+
+        for idx, lm in enumerate(landmarks):
+            center = (int(float(lm[0])*w), int(float(lm[1])*h))
+            r = 8 if idx == 0 else 5
+            for multiplier, alpha in POINT_GLOW:
+                c = tuple(int(x*alpha/255) for x in MINT)
+                cv2.circle(frame, center, r * multiplier, c, -1)
+
+    return frame
+
+
+def summarize(samples):
+    """
+    Latency summary for one stage
+
+    Args:
+        samples: list of durations in seconds
+
+    Returns:
+        dict with count, mean, p50, p95, p99 and max in milliseconds
+    """
+    if not samples:
+        return {'count': 0}
+
+    ms = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'count': int(ms.size),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(ms.max()), 3)
+    }
+
+
+def run_source(spec, max_frames=None, warmup=10, active=True, adaptive=False,
+               compare_render=False, warm_up_model=False):
+    """
+    Replay one source through the pipeline
+
+    Args:
+        spec: frame source spec, see core.frame_source.open_frame_source
+        max_frames: stop after this many measured frames
+        warmup: frames processed before measuring starts
+        active: start with the system active so swipe logic is exercised
+        adaptive: use the adaptive tracking scheduler; off by default so
+            every frame pays for full inference
+        compare_render: also draw each preview with the per-primitive
+            reference renderer, timing it and counting frames that differ
+        warm_up_model: prime the MediaPipe graph with blank frames before
+            the first real frame, as the backend does at startup
+
+    Returns:
+        dict with throughput, stage summaries and recognized gestures
+    """
+    source = open_frame_source(spec, realtime=False)
+    if not source.isOpened():
+        raise RuntimeError(f"Could not open source: {spec}")
+
+    media = NullMediaController()
+    t0 = time.perf_counter()
+    # Landmark recordings skip inference, so they run without MediaPipe
+    engine = GestureEngine(media_controller=media, adaptive=adaptive,
+                           inference=not source.provides_landmarks)
+    startup = {'engine_init_ms': round((time.perf_counter() - t0) * 1000.0, 1)}
+    if warm_up_model:
+        startup['warm_up_ms'] = round(engine.warm_up() * 1000.0, 1)
+    engine.is_active = active
+    loop_start = time.perf_counter()
+
+    samples = {stage: [] for stage in STAGES}
+    gestures = {}
+    frames = 0
+    detected = 0
+    render_mismatches = 0
+    wall_start = None
+
+    try:
+        while max_frames is None or frames < max_frames:
+            ok, frame = source.read()
+            if not ok:
+                break
+
+            timings = {}
+            t0 = time.perf_counter()
+
+            if source.provides_landmarks:
+                result = engine.process_hand_data(frame, timings=timings)
+            else:
+                result = engine.process_frame(frame, timings=timings, annotate=False)
+
+            t1 = time.perf_counter()
+            tracking_frame = create_tracking_frame(result)
+            t2 = time.perf_counter()
+            encode_frame(tracking_frame)
+            t3 = time.perf_counter()
+
+            timings['render'] = t2 - t1
+            timings['encode'] = t3 - t2
+            timings['total'] = t3 - t0
+
+            if 'first_frame_ms' not in startup:
+                startup['first_frame_ms'] = round(timings['total'] * 1000.0, 1)
+            if result['hand_detected'] and 'first_landmark_ms' not in startup:
+                startup['first_landmark_ms'] = round((t3 - loop_start) * 1000.0, 1)
+
+            if compare_render:
+                t4 = time.perf_counter()
+                reference = reference_tracking_frame(result)
+                timings['render_reference'] = time.perf_counter() - t4
+                if warmup <= 0 and not np.array_equal(reference, tracking_frame):
+                    render_mismatches += 1
+
+            if warmup > 0:
+                warmup -= 1
+                continue
+
+            if wall_start is None:
+                wall_start = t0
+
+            frames += 1
+            detected += int(result['hand_detected'])
+            if result['current_gesture']:
+                gestures[result['current_gesture']] = gestures.get(result['current_gesture'], 0) + 1
+
+            for stage, seconds in timings.items():
+                samples[stage].append(seconds)
+    finally:
+        source.release()
+        engine.command_executor.flush()
+        engine.release()
+
+    wall_time = (time.perf_counter() - wall_start) if wall_start is not None else 0.0
+
+    run = {
+        'source': spec,
+        'frames': frames,
+        'hand_frames': detected,
+        'wall_time_s': round(wall_time, 4),
+        'fps': round(frames / wall_time, 2) if wall_time > 0 else 0.0,
+        'stages': {stage: summarize(values) for stage, values in samples.items() if values},
+        'gestures': gestures,
+        'commands': media.commands,
+        'startup': startup
+    }
+    run['executor'] = engine.command_executor.get_stats()
+    if compare_render:
+        run['render_mismatches'] = render_mismatches
+    if engine.tracking_scheduler is not None:
+        run['scheduler'] = engine.tracking_scheduler.get_stats()
+    return run
+
+
+def environment_info():
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    try:
+        import cv2
+        info['opencv'] = cv2.__version__
+    except ImportError:
+        pass
+    try:
+        import mediapipe
+        info['mediapipe'] = mediapipe.__version__
+    except (ImportError, AttributeError):
+        pass
+    return info
+
+
+def print_report(report):
+    for run in report['runs']:
+        print(f"\n{run['source']}: {run['frames']} frames, "
+              f"{run['hand_frames']} with hand, {run['fps']} fps")
+        print(f"  {'stage':<18}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+        for stage in STAGES:
+            summary = run['stages'].get(stage)
+            if not summary:
+                continue
+            print(f"  {stage:<18}{summary['mean_ms']:>9.2f}{summary['p50_ms']:>9.2f}"
+                  f"{summary['p95_ms']:>9.2f}{summary['p99_ms']:>9.2f}{summary['max_ms']:>9.2f}")
+        print(f"  startup (ms): {run['startup']}")
+        if 'render_mismatches' in run:
+            print(f"  render mismatches vs reference: {run['render_mismatches']}")
+        if run['gestures']:
+            print(f"  gestures: {run['gestures']}")
+        if run['executor']['submitted']:
+            print(f"  executor: {run['executor']}")
+        if run.get('scheduler'):
+            print(f"  scheduler: {run['scheduler']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OKTrix gesture pipeline")
+    parser.add_argument('sources', nargs='+',
+                        help="frame source specs: video files, image directories or landmark traces")
+    parser.add_argument('--frames', type=int, default=None,
+                        help="maximum measured frames per source")
+    parser.add_argument('--warmup', type=int, default=10,
+                        help="frames to process before measuring")
+    parser.add_argument('--inactive', action='store_true',
+                        help="start with the system inactive (activation logic only)")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="use the adaptive tracking scheduler (idle skipping, ROI crops)")
+    parser.add_argument('--compare-render', action='store_true',
+                        help="time the per-primitive reference renderer and check output equality")
+    parser.add_argument('--warm-up', action='store_true',
+                        help="warm up the model before the first frame (see startup.first_frame_ms)")
+    parser.add_argument('--json', dest='json_path',
+                        help="write the machine-readable report here ('-' for stdout)")
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="exit with status 1 if any source's p95 total latency exceeds this")
+    args = parser.parse_args(argv)
+
+    report = {
+        'environment': environment_info(),
+        'runs': [
+            run_source(spec, args.frames, args.warmup,
+                       active=not args.inactive, adaptive=args.adaptive,
+                       compare_render=args.compare_render, warm_up_model=args.warm_up)
+            for spec in args.sources
+        ]
+    }
+
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    if args.budget_ms is not None:
+        over = [
+            run['source'] for run in report['runs']
+            if run['stages'].get('total', {}).get('p95_ms', 0) > args.budget_ms
+        ]
+        if over:
+            print(f"Latency budget of {args.budget_ms} ms exceeded: {', '.join(over)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
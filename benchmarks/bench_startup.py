@@ -0,0 +1,156 @@
+"""
+OKTrix Startup Benchmark
+Import-time profile of the backend's modules and time until the server
+reports each readiness phase
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --json startup.json --ready-budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import cost is tracked, cheapest first
+MODULES = (
+    'flask_socketio',
+    'numpy',
+    'cv2',
+    'mediapipe',
+    'core.preview',
+    'core.frame_source',
+    'core.hand_tracker',
+    'core.gesture_engine',
+    'modules.media_control'
+)
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+PHASE_LINE = re.compile(r'Phase (\w+) ready')
+
+
+def profile_import(module, top=5):
+    """
+    Import one module in a fresh interpreter with -X importtime
+
+    Returns:
+        dict with total milliseconds and the slowest nested imports
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+
+    entries = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entries.append((int(self_us), name))
+        # Top-level entries (single space of indent) add up to the total
+        if len(indent) == 1:
+            total_us += int(cumulative_us)
+
+    entries.sort(reverse=True)
+    return {
+        'total_ms': round(total_us / 1000.0, 1),
+        'slowest_self_ms': {name: round(us / 1000.0, 1) for us, name in entries[:top]}
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def time_backend_startup(timeout=60.0, source='landmarks:/dev/null'):
+    """
+    Start backend_server.py and time its stdout milestones
+
+    Returns:
+        dict with milliseconds until 'Backend ready' and each phase line
+    """
+    env = dict(os.environ, OKTRIX_SOURCE=source, PYTHONUNBUFFERED='1')
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, 'backend_server.py', str(free_port())],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+
+    milestones = {}
+    try:
+        for line in proc.stdout:
+            elapsed = round((time.perf_counter() - start) * 1000.0, 1)
+            if 'Backend ready' in line and 'ready' not in milestones:
+                milestones['ready'] = elapsed
+            match = PHASE_LINE.search(line)
+            if match:
+                milestones[match.group(1)] = elapsed
+            if 'model' in milestones or 'Pipeline failed' in line:
+                break
+            if time.perf_counter() - start > timeout:
+                break
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    return milestones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OKTrix backend startup")
+    parser.add_argument('--modules', nargs='*', default=list(MODULES),
+                        help="modules to profile")
+    parser.add_argument('--skip-server', action='store_true',
+                        help="only profile imports, don't start the backend")
+    parser.add_argument('--json', dest='json_path',
+                        help="write the machine-readable report here ('-' for stdout)")
+    parser.add_argument('--ready-budget-ms', type=float, default=None,
+                        help="exit with status 1 if 'Backend ready' takes longer than this")
+    args = parser.parse_args(argv)
+
+    report = {'imports': {module: profile_import(module) for module in args.modules}}
+    if not args.skip_server:
+        report['backend'] = time_backend_startup()
+
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"  {'module':<26}{'import':>10}  (ms)")
+        for module, result in report['imports'].items():
+            if 'error' in result:
+                print(f"  {module:<26}{'-':>10}  {result['error']}")
+            else:
+                print(f"  {module:<26}{result['total_ms']:>10.1f}")
+        if 'backend' in report:
+            print(f"\n  backend milestones (ms): {report['backend']}")
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    if args.ready_budget_ms is not None:
+        ready = report.get('backend', {}).get('ready')
+        if ready is None or ready > args.ready_budget_ms:
+            print(f"Startup budget of {args.ready_budget_ms} ms exceeded: {ready}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+OKTrix Trace Replay
+Feeds recorded binary traces back through the gesture logic and compares
+the gestures with the ones fired while recording
+
+Usage:
+    python benchmarks/replay_trace.py traces/session.oktrace
+    python benchmarks/replay_trace.py traces/*.oktrace --filter kalman --json replay.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_pipeline import NullMediaController
+from core.gesture_config import GestureConfig
+from core.gesture_engine import GestureEngine
+from core.trace import TraceReader
+
+
+def replay(path, landmark_filter=None):
+    """
+    Replay one trace flat out
+
+    Args:
+        path: Trace file
+        landmark_filter: Override the filter the trace was recorded with
+
+    Returns:
+        dict with throughput, recorded and replayed gesture events, and
+        the frames where they differ
+    """
+    reader = TraceReader(path)
+    if landmark_filter is None:
+        landmark_filter = reader.metadata.get('landmark_filter', 'one_euro')
+
+    # Traces carry the gesture config they were recorded with
+    raw_config = reader.metadata.get('gesture_config')
+    config = GestureConfig(raw_config, path) if raw_config is not None else None
+
+    media = NullMediaController()
+    engine = GestureEngine(media_controller=media, max_hands=reader.max_hands,
+                           landmark_filter=landmark_filter, config=config, inference=False)
+    # Frames whose recorded gestures include the activation toggle
+    toggled = {frame for frame, _, names in reader.gesture_events() if 'system_toggle' in names}
+
+    replayed = []
+    t0 = time.perf_counter()
+    try:
+        for i in range(len(reader)):
+            # Each record holds the state before its frame; a change not
+            # caused by the previous frame's toggle came from outside the
+            # engine (UI, tray, another stream) and is applied the same way
+            recorded_active = reader.was_active(i)
+            if recorded_active != engine.is_active and (i - 1) not in toggled:
+                engine.is_active = recorded_active
+                if not recorded_active:
+                    engine.reset()
+            was_active = engine.is_active
+            result = engine.process_hand_data(reader.hand_data(i))
+            gestures = [g['gesture'] for g in result['gestures']]
+            if result['system_active'] != was_active:
+                gestures.append('system_toggle')
+            if gestures:
+                replayed.append((i, sorted(gestures)))
+    finally:
+        engine.command_executor.flush()
+        engine.release()
+    wall_time = time.perf_counter() - t0
+
+    recorded = [(frame, sorted(names)) for frame, _, names in reader.gesture_events()]
+    timestamps = reader.timestamps
+    recorded_at = dict(recorded)
+    replayed_at = dict(replayed)
+    mismatches = [
+        {
+            'frame': frame,
+            't': round(float(timestamps[frame] - reader.start_time), 3),
+            'recorded': recorded_at.get(frame, []),
+            'replayed': replayed_at.get(frame, [])
+        }
+        for frame in sorted(set(recorded_at) | set(replayed_at))
+        if recorded_at.get(frame) != replayed_at.get(frame)
+    ]
+
+    return {
+        'trace': path,
+        'frames': len(reader),
+        'duration_s': round(float(timestamps[-1] - timestamps[0]), 3) if len(reader) else 0.0,
+        'landmark_filter': landmark_filter,
+        'fps': round(len(reader) / wall_time, 1) if wall_time > 0 else 0.0,
+        'recorded': [{'frame': frame, 'gestures': names} for frame, names in recorded],
+        'replayed': [{'frame': frame, 'gestures': names} for frame, names in replayed],
+        'mismatches': mismatches
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay OKTrix landmark traces")
+    parser.add_argument('traces', nargs='+', help="trace files (*.oktrace)")
+    parser.add_argument('--filter', dest='landmark_filter', default=None,
+                        help="landmark filter to replay with (default: as recorded)")
+    parser.add_argument('--json', dest='json_path',
+                        help="write the machine-readable report here ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    runs = [replay(path, args.landmark_filter) for path in args.traces]
+
+    if args.json_path == '-':
+        json.dump(runs, sys.stdout, indent=2)
+        print()
+    else:
+        for run in runs:
+            print(f"\n{run['trace']}: {run['frames']} frames ({run['duration_s']} s), "
+                  f"{run['fps']} fps, filter {run['landmark_filter']}")
+            print(f"  gestures recorded {len(run['recorded'])}, replayed {len(run['replayed'])}")
+            for mismatch in run['mismatches']:
+                print(f"  frame {mismatch['frame']} (t={mismatch['t']}s): "
+                      f"recorded {mismatch['recorded'] or '-'}, replayed {mismatch['replayed'] or '-'}")
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(runs, f, indent=2)
+
+    # A regression run fails when the gesture logic no longer reproduces a trace
+    return 1 if any(run['mismatches'] for run in runs) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+OKTrix Camera Workers
+Per-camera capture and hand inference in separate processes, so each
+extra camera adds a core instead of halving the frame rate
+"""
+
+import multiprocessing
+import queue
+
+
+def _strip_frame(hand_data):
+    """
+    Drop image data before sending results across processes
+    """
+    return {key: value for key, value in hand_data.items() if key != 'annotated_frame'}
+
+
+def camera_worker(stream_id, source_spec, max_hands, adaptive, results, stop_event):
+    """
+    Worker process body: capture, track hands, send landmarks back
+
+    Args:
+        stream_id: Index of this camera in the pipeline
+        source_spec: Frame source spec for open_frame_source()
+        max_hands: Hands tracked per camera
+        adaptive: Use TrackingScheduler for idle skipping and ROI crops
+        results: Queue receiving (stream_id, timestamp, hand_data, env_quality)
+        stop_event: Event that ends the loop
+    """
+    # Exit without waiting for the parent to drain queued results
+    results.cancel_join_thread()
+
+    # Heavy imports happen in the worker, not in the parent
+    from .environment import ExposureController
+    from .frame_grabber import FrameGrabber
+    from .frame_source import open_frame_source
+    from .hand_tracker import HandTracker
+    from .tracking_scheduler import TrackingScheduler
+
+    source = open_frame_source(source_spec)
+    if not source.isOpened():
+        print(f"Camera {stream_id} failed: {source_spec}")
+        return
+
+    tracker = None
+    scheduler = None
+    exposure = None
+    if not source.provides_landmarks:
+        tracker = HandTracker(
+            max_hands=max_hands,
+            detection_confidence=0.7,
+            tracking_confidence=0.7
+        )
+        if adaptive:
+            scheduler = TrackingScheduler(tracker)
+
+    grabber = FrameGrabber(source).start()
+    if tracker is not None:
+        exposure = ExposureController(grabber)
+    print(f"Camera {stream_id} started ({source_spec})")
+
+    try:
+        while not stop_event.is_set():
+            ok, frame, captured_at = grabber.read(timeout=0.5)
+            if not ok:
+                continue
+
+            if source.provides_landmarks:
+                hand_data = frame
+                env_quality = None
+            else:
+                hand_data = (scheduler or tracker).process_frame(frame, annotate=False)
+                env_quality = tracker.check_environment(frame)
+                exposure.update(env_quality, captured_at)
+
+            message = (stream_id, captured_at, _strip_frame(hand_data), env_quality)
+            try:
+                results.put_nowait(message)
+            except queue.Full:
+                # Consumer is behind; newer results will follow
+                pass
+    finally:
+        grabber.stop()
+        if exposure is not None:
+            exposure.restore()
+        source.release()
+        if tracker is not None:
+            tracker.release()
+
+
+class MultiCameraPipeline:
+    def __init__(self, source_specs, max_hands=2, adaptive=True, queue_size=16):
+        """
+        Run one capture + inference process per camera
+
+        Args:
+            source_specs: list of frame source specs, one per stream
+            max_hands: Hands tracked per camera
+            adaptive: Use the adaptive tracking scheduler in each worker
+            queue_size: Results buffered before workers start dropping
+        """
+        self.source_specs = list(source_specs)
+        self.max_hands = max_hands
+        self.adaptive = adaptive
+
+        # spawn behaves the same on Windows and Linux and avoids forking
+        # a process that already runs capture threads
+        self._context = multiprocessing.get_context('spawn')
+        self.results = self._context.Queue(maxsize=queue_size)
+        self.stop_event = self._context.Event()
+        self.workers = []
+
+        self.frames_received = [0] * len(self.source_specs)
+
+    def start(self):
+        """
+        Start all worker processes
+
+        Returns:
+            self, for chaining
+        """
+        self.stop_event.clear()
+        for stream_id, spec in enumerate(self.source_specs):
+            worker = self._context.Process(
+                target=camera_worker,
+                args=(stream_id, spec, self.max_hands, self.adaptive,
+                      self.results, self.stop_event),
+                daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+        return self
+
+    def read(self, timeout=1.0):
+        """
+        Next tracking result from any camera
+
+        Returns:
+            tuple (stream_id, timestamp, hand_data, env_quality), or None
+            on timeout
+        """
+        try:
+            message = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.frames_received[message[0]] += 1
+        return message
+
+    def is_alive(self):
+        return any(worker.is_alive() for worker in self.workers)
+
+    def stop(self):
+        """
+        Stop all workers and wait for them to exit
+        """
+        self.stop_event.set()
+        # Drain so workers blocked on a full queue can exit
+        while True:
+            try:
+                self.results.get_nowait()
+            except queue.Empty:
+                break
+        for worker in self.workers:
+            worker.join(timeout=3.0)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
@@ -0,0 +1,217 @@
+"""
+OKTrix Command Executor
+Runs media commands one at a time on a single long-lived thread
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+
+# Repeating these twice cancels out, so each one runs on its own
+NON_COALESCING = frozenset({'play_pause'})
+
+
+class CommandExecutor:
+    def __init__(self, handler, max_queue=8, deadline=0.5, non_coalescing=NON_COALESCING,
+                 metrics=None):
+        """
+        Serialize gesture commands instead of starting a thread per gesture
+
+        Commands run in order on one worker thread, so they never fight
+        over window focus or pyautogui. A command that repeats the one
+        waiting at the back of the queue is merged into it (three
+        swipe_up become one volume step of 3, their magnitudes summed).
+        Commands still queued
+        deadline seconds after they were last requested are dropped: a
+        late track skip is worse than none.
+
+        Args:
+            handler: callable(command, count, magnitude) doing the actual work
+            max_queue: Pending commands kept; the oldest is dropped when full
+            deadline: Seconds a queued command stays valid
+            non_coalescing: Commands that are never merged
+            metrics: optional PipelineMetrics; handler time is recorded as
+                'command' and request-to-completion time as
+                'command_latency', queue events as the counters
+                commands_submitted, commands_coalesced, commands_dropped
+                (stale), commands_dropped_full and command_errors, and the
+                queue length as the command_queue_depth gauge
+        """
+        self.handler = handler
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.non_coalescing = frozenset(non_coalescing)
+        self.metrics = metrics
+
+        # Entries are [command, count, magnitude, first_requested, last_requested]
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._busy = False
+
+        # Counters
+        self.submitted = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.dropped_stale = 0
+        self.dropped_full = 0
+        self.failed = 0
+        self.max_depth = 0
+        # Request to completion, seconds
+        self.latencies = collections.deque(maxlen=256)
+
+    def start(self):
+        """
+        Start the worker thread
+
+        Returns:
+            self, for chaining
+        """
+        if self._thread is not None:
+            return self
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, command, magnitude=None):
+        """
+        Queue a command without waiting for it
+
+        Args:
+            command: gesture name, e.g. 'swipe_up'
+            magnitude: optional size of the gesture, summed when merged
+        """
+        now = time.monotonic()
+        with self._condition:
+            self.submitted += 1
+            self._count('commands_submitted')
+
+            if (self._queue and self._queue[-1][0] == command and
+                    command not in self.non_coalescing):
+                entry = self._queue[-1]
+                entry[1] += 1
+                if entry[2] is not None and magnitude is not None:
+                    entry[2] += magnitude
+                else:
+                    entry[2] = None
+                entry[4] = now
+                self.coalesced += 1
+                self._count('commands_coalesced')
+                return
+
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped_full += 1
+                self._count('commands_dropped_full')
+
+            self._queue.append([command, 1, magnitude, now, now])
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._publish_depth()
+            self._condition.notify_all()
+
+    def _count(self, counter):
+        if self.metrics is not None:
+            self.metrics.increment(counter)
+
+    def _publish_depth(self):
+        # Called with the condition held
+        if self.metrics is not None:
+            self.metrics.set_gauge('command_queue_depth', len(self._queue))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                entry = self._queue.popleft()
+                self._publish_depth()
+                self._busy = True
+
+            try:
+                self._execute(*entry)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _execute(self, command, count, magnitude, first_requested, last_requested):
+        if time.monotonic() - last_requested > self.deadline:
+            self.dropped_stale += 1
+            self._count('commands_dropped')
+            print(f"Dropped stale command: {command}")
+            return
+
+        t0 = time.perf_counter()
+        try:
+            self.handler(command, count, magnitude)
+            self.executed += 1
+        except Exception as e:
+            self.failed += 1
+            self._count('command_errors')
+            print(f"Command error ({command}): {e}")
+        latency = time.monotonic() - first_requested
+        if self.metrics is not None:
+            self.metrics.record('command', time.perf_counter() - t0)
+            self.metrics.record('command_latency', latency)
+
+        self.latencies.append(latency)
+
+    def flush(self, timeout=1.0):
+        """
+        Wait until every queued command has run or been dropped
+
+        Returns:
+            bool: False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._queue and not self._busy, timeout)
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._queue)
+
+    def get_stats(self):
+        """
+        Queue and latency counters
+
+        Returns:
+            dict with counts, queue depth and latency in milliseconds
+        """
+        stats = {
+            'queue_depth': self.queue_depth(),
+            'max_depth': self.max_depth,
+            'submitted': self.submitted,
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'dropped_stale': self.dropped_stale,
+            'dropped_full': self.dropped_full,
+            'failed': self.failed
+        }
+        if self.latencies:
+            ms = np.asarray(self.latencies) * 1000.0
+            stats['latency_mean_ms'] = round(float(ms.mean()), 2)
+            stats['latency_p95_ms'] = round(float(np.percentile(ms, 95)), 2)
+        return stats
+
+    def stop(self):
+        """
+        Stop the worker; commands still queued are discarded
+        """
+        if self._thread is None:
+            return
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._publish_depth()
+            self._condition.notify_all()
+        self._thread.join(timeout=2.0)
+        self._thread = None
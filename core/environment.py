@@ -0,0 +1,297 @@
+"""
+OKTrix Environment Analysis
+Low-rate lighting estimate from a strided view of the frame, with
+back-lighting detection and camera exposure/gain feedback
+"""
+
+import functools
+import time
+
+import cv2
+import numpy as np
+
+
+# Luminance histogram: 32 bins of 8 levels
+HISTOGRAM_BINS = 32
+BIN_WIDTH = 256 // HISTOGRAM_BINS
+
+
+class EnvironmentMonitor:
+    def __init__(self, every=5, stride=8, smoothing=0.3, dark=50, bright=200,
+                 shadow_level=50, highlight_level=224, backlit_shadows=0.35,
+                 backlit_highlights=0.12):
+        """
+        Lighting estimate that changes slowly, so it is measured slowly
+
+        Every `every` frames, luminance is computed on every `stride`-th
+        pixel (80x60 samples of a 640x480 frame) and folded into
+        exponential moving averages of the mean and of a histogram.
+        Frames in between return the last estimate.
+
+        Back-lighting (a window or lamp behind the hand) leaves the mean in
+        range but puts much of the frame in deep shadow and a bright area
+        in clipped highlights; the histogram catches that.
+
+        Args:
+            every: Analyze one frame in this many
+            stride: Pixel step in both directions
+            smoothing: EMA weight of the newest sample (0-1]
+            dark, bright: Mean luminance limits (0-255)
+            shadow_level, highlight_level: Luminance below / at or above
+                which a pixel counts as shadow / highlight
+            backlit_shadows, backlit_highlights: Fractions of the frame in
+                shadow and in highlights that together mean back-lighting
+        """
+        self.every = max(1, int(every))
+        self.stride = max(1, int(stride))
+        self.smoothing = smoothing
+        self.dark = dark
+        self.bright = bright
+        self.shadow_bins = shadow_level // BIN_WIDTH
+        self.highlight_bins = highlight_level // BIN_WIDTH
+        self.backlit_shadows = backlit_shadows
+        self.backlit_highlights = backlit_highlights
+
+        self.brightness = None
+        self.histogram = np.zeros(HISTOGRAM_BINS, dtype=np.float32)
+        self.result = None
+        self._frames = 0
+
+        # Counters
+        self.frames_seen = 0
+        self.frames_analyzed = 0
+
+    def update(self, frame):
+        """
+        Feed one frame
+
+        Args:
+            frame: BGR image
+
+        Returns:
+            dict with:
+                - quality: "good", "dark", "bright" or "backlit"
+                - brightness: int (0-255), smoothed mean luminance
+                - shadows, highlights: smoothed fractions of the frame
+        """
+        self.frames_seen += 1
+        due = self._frames % self.every == 0
+        self._frames += 1
+        if not due and self.result is not None:
+            return self.result
+
+        gray = self.luminance(frame)
+        histogram = np.bincount((gray // BIN_WIDTH).ravel(), minlength=HISTOGRAM_BINS)
+        histogram = histogram.astype(np.float32) / gray.size
+        brightness = float(gray.mean())
+
+        if self.brightness is None:
+            self.brightness = brightness
+            self.histogram[:] = histogram
+        else:
+            a = self.smoothing
+            self.brightness += a * (brightness - self.brightness)
+            self.histogram += a * (histogram - self.histogram)
+
+        self.frames_analyzed += 1
+        self.result = self._classify()
+        return self.result
+
+    def luminance(self, frame):
+        """
+        Returns:
+            uint8 grayscale of the strided view
+        """
+        view = frame[::self.stride, ::self.stride]
+        if view.ndim == 2:
+            return np.ascontiguousarray(view)
+        return cv2.cvtColor(np.ascontiguousarray(view), cv2.COLOR_BGR2GRAY)
+
+    def _classify(self):
+        shadows = float(self.histogram[:self.shadow_bins].sum())
+        highlights = float(self.histogram[self.highlight_bins:].sum())
+
+        if self.brightness < self.dark:
+            quality = "dark"
+        elif self.brightness > self.bright:
+            quality = "bright"
+        elif shadows >= self.backlit_shadows and highlights >= self.backlit_highlights:
+            quality = "backlit"
+        else:
+            quality = "good"
+
+        return {
+            'quality': quality,
+            'brightness': int(self.brightness),
+            'shadows': round(shadows, 3),
+            'highlights': round(highlights, 3)
+        }
+
+    def reset(self):
+        self.brightness = None
+        self.histogram.fill(0.0)
+        self.result = None
+        self._frames = 0
+
+    def get_stats(self):
+        return {
+            'frames_seen': self.frames_seen,
+            'frames_analyzed': self.frames_analyzed,
+            'quality': self.result['quality'] if self.result else None
+        }
+
+
+class ExposureController:
+    # CAP_PROP_AUTO_EXPOSURE value for manual mode per OpenCV capture
+    # backend (V4L2: 0.25 manual, 0.75 aperture priority). Elsewhere the
+    # toggle is skipped; DirectShow and MSMF drivers leave auto exposure
+    # when an exposure value is set
+    MANUAL_EXPOSURE = {'V4L2': 0.25}
+
+    def __init__(self, grabber, hold=1.0, settle=1.5, max_steps=3, gain_step=16.0):
+        """
+        Nudge camera exposure and gain while the lighting stays bad
+
+        Each step is one stop of exposure (exposure properties on a log2
+        scale, as DirectShow reports them, move by 1; absolute ones double
+        or halve). Where exposure can't be set, gain moves instead. Dark
+        and back-lit scenes step up, over-bright ones step down. A step
+        needs the quality to have been bad for `hold` seconds and the
+        previous step to have settled, so the smoothed estimate catches up
+        between steps.
+
+        Property changes run on the grabber's capture thread between two
+        reads (FrameGrabber.call), never concurrently with read().
+
+        Args:
+            grabber: FrameGrabber around a FrameSource; sources that can't
+                apply properties disable the controller
+            hold: Seconds of bad lighting before the first step
+            settle: Seconds between steps
+            max_steps: Steps allowed away from the starting settings, in
+                either direction
+            gain_step: Gain change per step when exposure is unavailable
+        """
+        self.grabber = grabber
+        self.hold = hold
+        self.settle = settle
+        self.max_steps = max_steps
+        self.gain_step = gain_step
+
+        self.enabled = True
+        self.steps = 0
+        self._bad_since = None
+        self._last_step = None
+        # A step queued on the capture thread that hasn't run yet
+        self._pending = False
+        # Settings before the first step, restored on release
+        self._original = None
+        self._exposure_settable = True
+
+        # Counters
+        self.adjustments = 0
+        self.failures = 0
+
+    def update(self, env_quality, now=None):
+        """
+        Feed the latest environment estimate
+
+        Args:
+            env_quality: dict from EnvironmentMonitor.update(), or None
+            now: Frame time in seconds (defaults to now)
+
+        Returns:
+            bool: whether a step was queued
+        """
+        if not self.enabled or not env_quality or self._pending:
+            return False
+        if now is None:
+            now = time.time()
+
+        quality = env_quality['quality']
+        if quality == 'good':
+            self._bad_since = None
+            return False
+        if self._bad_since is None:
+            self._bad_since = now
+        if now - self._bad_since < self.hold:
+            return False
+        if self._last_step is not None and now - self._last_step < self.settle:
+            return False
+
+        direction = -1 if quality == 'bright' else 1
+        if abs(self.steps + direction) > self.max_steps:
+            return False
+
+        self._last_step = now
+        self._pending = True
+        self.grabber.call(functools.partial(self._step, direction=direction, quality=quality))
+        return True
+
+    def _step(self, capture, direction, quality):
+        """Apply one step; runs on the capture thread"""
+        try:
+            applied = self._apply(capture, direction)
+        finally:
+            self._pending = False
+
+        if not applied:
+            self.failures += 1
+            self.enabled = False
+            self._restore(capture)
+            print("Camera exposure and gain can't be set, lighting feedback disabled")
+            return
+
+        self.steps += direction
+        self.adjustments += 1
+        print(f"Lighting {quality}: camera exposure step {self.steps:+d}")
+
+    def _apply(self, capture, direction):
+        if self._original is None:
+            backend = capture.get_backend_name() if hasattr(capture, 'get_backend_name') else None
+            manual = self.MANUAL_EXPOSURE.get(backend)
+            self._original = {
+                'auto': capture.get(cv2.CAP_PROP_AUTO_EXPOSURE) if manual is not None else None,
+                'exposure': capture.get(cv2.CAP_PROP_EXPOSURE),
+                'gain': capture.get(cv2.CAP_PROP_GAIN)
+            }
+            if manual is not None:
+                # Auto exposure would undo every step
+                capture.set(cv2.CAP_PROP_AUTO_EXPOSURE, manual)
+
+        if self._exposure_settable:
+            exposure = capture.get(cv2.CAP_PROP_EXPOSURE)
+            if exposure <= 0:
+                target = exposure + direction
+            else:
+                target = exposure * (2.0 ** direction)
+            if capture.set(cv2.CAP_PROP_EXPOSURE, target):
+                return True
+            self._exposure_settable = False
+
+        gain = capture.get(cv2.CAP_PROP_GAIN)
+        return bool(capture.set(cv2.CAP_PROP_GAIN, max(0.0, gain + direction * self.gain_step)))
+
+    def restore(self):
+        """
+        Put back the camera's settings from before the first step
+        """
+        self.grabber.call(self._restore)
+
+    def _restore(self, capture):
+        original, self._original = self._original, None
+        if original is None:
+            return
+        capture.set(cv2.CAP_PROP_EXPOSURE, original['exposure'])
+        capture.set(cv2.CAP_PROP_GAIN, original['gain'])
+        if original['auto'] is not None:
+            capture.set(cv2.CAP_PROP_AUTO_EXPOSURE, original['auto'])
+        self.steps = 0
+
+    def get_stats(self):
+        return {
+            'enabled': self.enabled,
+            'steps': self.steps,
+            'adjustments': self.adjustments,
+            'failures': self.failures
+        }
@@ -0,0 +1,176 @@
+"""
+OKTrix Frame Grabber
+Dedicated capture thread that keeps only the newest camera frame
+"""
+
+import collections
+import threading
+import time
+
+
+class FrameGrabber:
+    def __init__(self, capture, metrics=None):
+        """
+        Wrap a capture device with a latest-frame-wins buffer
+
+        The capture thread reads as fast as the device delivers and
+        overwrites a single slot, so the consumer always gets the freshest
+        frame and never works through a backlog.
+
+        Args:
+            capture: object with read() -> (ok, frame), e.g. cv2.VideoCapture
+            metrics: optional PipelineMetrics; each read is timed as 'capture'
+        """
+        self.capture = capture
+        self.metrics = metrics
+
+        self._condition = threading.Condition()
+        self._frame = None
+        self._frame_time = 0.0
+        self._frame_captured_at = 0.0
+        self._sequence = 0
+        self._last_read_sequence = 0
+
+        self._running = False
+        self._thread = None
+        # Functions to run against the capture between reads
+        self._calls = collections.deque()
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_consumed = 0
+        self.read_failures = 0
+
+    def start(self):
+        """
+        Start the capture thread
+
+        Returns:
+            self, for chaining
+        """
+        if self._running:
+            return self
+
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def call(self, fn):
+        """
+        Run fn(capture) on the capture thread, between two reads
+
+        Capture devices aren't thread-safe: setting a property while
+        another thread is inside read() can hang or corrupt DirectShow and
+        MSMF captures. Without a running thread fn runs right away on the
+        caller's thread.
+
+        Args:
+            fn: callable taking the capture
+        """
+        with self._condition:
+            if self._running:
+                self._calls.append(fn)
+                return
+        fn(self.capture)
+
+    def _run_calls(self):
+        while self._calls:
+            fn = self._calls.popleft()
+            try:
+                fn(self.capture)
+            except Exception as e:
+                print(f"Capture call failed: {e}")
+
+    def _capture_loop(self):
+        while self._running:
+            self._run_calls()
+            t0 = time.perf_counter()
+            ret, frame = self.capture.read()
+            if self.metrics is not None:
+                self.metrics.record('capture', time.perf_counter() - t0)
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.005)
+                continue
+
+            with self._condition:
+                # Previous frame was never picked up
+                if self._sequence > self._last_read_sequence:
+                    self.frames_dropped += 1
+
+                self._frame = frame
+                self._frame_time = time.monotonic()
+                self._frame_captured_at = time.time()
+                self._sequence += 1
+                self.frames_captured += 1
+                self._condition.notify()
+
+    def read(self, timeout=1.0):
+        """
+        Wait for a frame newer than the last one returned
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            tuple (ok, frame, captured_at): cv2.VideoCapture.read()'s
+            result plus the frame's wall-clock capture time, taken
+            together so a newer frame can't slip in between
+        """
+        with self._condition:
+            if not self._running and self._sequence <= self._last_read_sequence:
+                # Stopped: nothing will arrive, but wait out the timeout so
+                # callers polling in a loop don't spin
+                self._condition.wait(timeout)
+                return False, None, None
+
+            has_new = self._condition.wait_for(
+                lambda: self._sequence > self._last_read_sequence or not self._running,
+                timeout=timeout
+            )
+            if not has_new or self._sequence <= self._last_read_sequence:
+                return False, None, None
+
+            self._last_read_sequence = self._sequence
+            self.frames_consumed += 1
+            return True, self._frame, self._frame_captured_at
+
+    def get_frame_age(self):
+        """
+        Seconds since the newest frame was captured
+
+        Returns:
+            float, or None before the first frame
+        """
+        if self._sequence == 0:
+            return None
+        return time.monotonic() - self._frame_time
+
+    def get_stats(self):
+        """
+        Capture counters
+
+        Returns:
+            dict with captured, consumed, dropped and failed read counts
+        """
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_consumed': self.frames_consumed,
+            'frames_dropped': self.frames_dropped,
+            'read_failures': self.read_failures
+        }
+
+    def stop(self):
+        """
+        Stop the capture thread (does not release the capture device)
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        # Calls queued while the thread was finishing its last read
+        self._run_calls()
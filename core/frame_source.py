@@ -0,0 +1,356 @@
+"""
+OKTrix Frame Sources
+Pluggable inputs for the gesture pipeline: live camera, video file,
+image directory and recorded landmark streams
+"""
+
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FrameSource:
+    """
+    Base class for anything that feeds frames into the pipeline
+
+    read() mirrors cv2.VideoCapture.read() so sources can be wrapped by
+    FrameGrabber. Sources with provides_landmarks = True return a
+    HandTracker-style dict instead of an image and skip inference.
+    """
+
+    provides_landmarks = False
+
+    def __init__(self, realtime=True, fps=30.0):
+        """
+        Args:
+            realtime: Pace reads to the source's own timing; False replays
+                as fast as possible
+            fps: Nominal frame rate, used when the source has no timestamps
+        """
+        self.realtime = realtime
+        self.fps = fps
+        self.frame_index = 0
+        self._start_clock = None
+        self._start_timestamp = None
+
+    def read(self):
+        """
+        Returns:
+            tuple (ok, frame)
+        """
+        raise NotImplementedError
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        """
+        Set a capture property (only meaningful for live cameras)
+
+        Returns:
+            bool: whether the property was applied
+        """
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def get_backend_name(self):
+        """
+        Returns:
+            OpenCV capture backend ('V4L2', 'DSHOW', 'MSMF', ...), or None
+        """
+        return None
+
+    def release(self):
+        pass
+
+    def _pace(self, timestamp=None):
+        """
+        Sleep until the frame is due when replaying in real time
+
+        Args:
+            timestamp: Source timestamp in seconds, or None to derive it
+                from frame_index and fps
+        """
+        if timestamp is None:
+            timestamp = self.frame_index / self.fps if self.fps else 0.0
+        self.frame_index += 1
+
+        if not self.realtime:
+            return
+
+        now = time.monotonic()
+        if self._start_clock is None:
+            self._start_clock = now
+            self._start_timestamp = timestamp
+            return
+
+        delay = (timestamp - self._start_timestamp) - (now - self._start_clock)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _restart_clock(self):
+        self.frame_index = 0
+        self._start_clock = None
+        self._start_timestamp = None
+
+
+class CameraSource(FrameSource):
+    def __init__(self, index=0, width=640, height=480, mirror=True):
+        """
+        Live webcam
+
+        The camera paces itself, so realtime has no effect here.
+
+        Args:
+            index: OpenCV camera index
+            width, height: Requested capture resolution
+            mirror: Flip horizontally so the preview behaves like a mirror
+        """
+        super().__init__(realtime=False)
+        self.mirror = mirror
+
+        # DirectShow opens much faster than MSMF on Windows
+        backend = cv2.CAP_DSHOW if sys.platform == 'win32' else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, backend)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # Keep the driver queue short, the grabber holds the newest frame
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret and self.mirror:
+            frame = cv2.flip(frame, 1)
+        return ret, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def get_backend_name(self):
+        try:
+            return self.cap.getBackendName()
+        except cv2.error:
+            return None
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=True, loop=False, mirror=False):
+        """
+        Recorded video clip
+
+        Args:
+            path: Any file OpenCV can decode
+            realtime: Play at the clip's frame rate instead of flat out
+            loop: Restart from the beginning at end of file
+            mirror: Flip horizontally (for raw, unmirrored recordings)
+        """
+        self.path = path
+        self.loop = loop
+        self.mirror = mirror
+        self.cap = cv2.VideoCapture(path)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(realtime=realtime, fps=fps)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._restart_clock()
+            ret, frame = self.cap.read()
+        if not ret:
+            return False, None
+
+        self._pace()
+        if self.mirror:
+            frame = cv2.flip(frame, 1)
+        return True, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path, fps=30.0, realtime=True, loop=False):
+        """
+        Directory of still images, replayed in file name order
+
+        Args:
+            path: Directory containing .png/.jpg/.bmp frames
+            fps: Playback rate in real time mode
+            realtime: Pace at fps instead of flat out
+            loop: Restart at the first image after the last one
+        """
+        super().__init__(realtime=realtime, fps=fps)
+        self.path = path
+        self.loop = loop
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.position = 0
+
+    def read(self):
+        if self.position >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+            self.position = 0
+            self._restart_clock()
+
+        frame = cv2.imread(self.files[self.position])
+        self.position += 1
+        if frame is None:
+            return False, None
+
+        self._pace()
+        return True, frame
+
+    def isOpened(self):
+        return bool(self.files)
+
+
+class LandmarkStreamSource(FrameSource):
+    provides_landmarks = True
+
+    def __init__(self, path, realtime=True, loop=False):
+        """
+        Recorded landmark stream, replayed without MediaPipe or a camera
+
+        The file is JSON lines, one frame per line:
+            {"t": 0.033, "landmarks": [[x, y, z], ...] or null,
+             "handedness": "Right" or null}
+
+        Multi-hand recordings use a "hands" list instead:
+            {"t": 0.033, "hands": [{"landmarks": [...], "handedness": "Left"}, ...]}
+
+        read() returns a dict shaped like HandTracker.process_frame()
+        output, ready for GestureEngine.process_hand_data(), with the
+        recorded time as 'timestamp' so gesture timing replays exactly at
+        any speed.
+
+        Args:
+            path: JSON lines file
+            realtime: Replay with the recorded timing instead of flat out
+            loop: Restart at end of file
+        """
+        super().__init__(realtime=realtime)
+        self.path = path
+        self.loop = loop
+        with open(path, 'r', encoding='utf-8') as f:
+            self.records = [json.loads(line) for line in f if line.strip()]
+        self.position = 0
+        # Added to recorded times so they keep increasing across loops
+        self._time_offset = 0.0
+        self._last_timestamp = None
+
+    def read(self):
+        if self.position >= len(self.records):
+            if not self.loop or not self.records:
+                return False, None
+            self.position = 0
+            self._restart_clock()
+            self._time_offset = self._last_timestamp + 1.0 / self.fps - self._record_time(0)
+
+        record = self.records[self.position]
+        timestamp = self._record_time(self.position)
+        self.position += 1
+        self._pace(timestamp)
+        self._last_timestamp = self._time_offset + timestamp
+
+        if 'hands' in record:
+            recorded = record['hands'] or []
+        elif record.get('landmarks'):
+            recorded = [record]
+        else:
+            recorded = []
+
+        hands = [
+            {
+                'landmarks': np.asarray(hand['landmarks'], dtype=np.float32),
+                'handedness': hand.get('handedness'),
+                'score': hand.get('score', 1.0)
+            }
+            for hand in recorded if hand.get('landmarks')
+        ]
+        first = hands[0] if hands else {}
+
+        return True, {
+            'detected': bool(hands),
+            'landmarks': first.get('landmarks'),
+            'handedness': first.get('handedness'),
+            'hands': hands,
+            'annotated_frame': None,
+            'timestamp': self._last_timestamp
+        }
+
+    def _record_time(self, position):
+        timestamp = self.records[position].get('t')
+        return timestamp if timestamp is not None else position / self.fps
+
+    def isOpened(self):
+        return bool(self.records)
+
+
+def open_frame_source(spec='camera', realtime=True, loop=False):
+    """
+    Build a frame source from a short spec string
+
+    Args:
+        spec: One of
+            - "camera" or "camera:<index>"
+            - "video:<path>"
+            - "images:<directory>"
+            - "landmarks:<path>"
+            - "trace:<path>" (binary trace from TraceRecorder)
+            - a bare path (type inferred from the file)
+        realtime: Pace file-based sources to their own timing
+        loop: Loop file-based sources
+
+    Returns:
+        FrameSource
+    """
+    kind, _, target = spec.partition(':')
+
+    # Bare path, e.g. C:\\clips\\swipe.mp4 or ./frames
+    if kind not in ('camera', 'video', 'images', 'landmarks', 'trace'):
+        target = spec
+        if os.path.isdir(spec):
+            kind = 'images'
+        elif spec.lower().endswith(('.jsonl', '.json')):
+            kind = 'landmarks'
+        elif spec.lower().endswith('.oktrace'):
+            kind = 'trace'
+        else:
+            kind = 'video'
+
+    if kind == 'camera':
+        return CameraSource(index=int(target) if target else 0)
+    if kind == 'video':
+        return VideoFileSource(target, realtime=realtime, loop=loop)
+    if kind == 'images':
+        return ImageDirectorySource(target, realtime=realtime, loop=loop)
+    if kind == 'trace':
+        from .trace import TraceSource
+        return TraceSource(target, realtime=realtime, loop=loop)
+    return LandmarkStreamSource(target, realtime=realtime, loop=loop)
@@ -0,0 +1,338 @@
+"""
+OKTrix Gesture Config
+Declarative poses, motions, cooldowns and player actions
+(config/gestures.json), compiled into dispatch tables and hot-reloaded
+"""
+
+import json
+import os
+import threading
+
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'config', 'gestures.json')
+
+DIRECTIONS = ('left', 'right', 'up', 'down')
+ACTIONS = ('play_pause', 'next_track', 'previous_track', 'volume_up', 'volume_down', 'none')
+PLAYER_ACTIONS = ('play_pause', 'next_track', 'previous_track')
+
+
+class GestureRule:
+    __slots__ = ('name', 'pose', 'direction', 'cooldown', 'action')
+
+    def __init__(self, name, pose, direction, cooldown, action):
+        """
+        One gesture: a pose plus a motion direction, mapped to an action
+
+        Args:
+            cooldown: Seconds before the same hand can fire again, or None
+                for the engine's default
+        """
+        self.name = name
+        self.pose = pose
+        self.direction = direction
+        self.cooldown = cooldown
+        self.action = action
+
+
+class SwipeDetector:
+    kind = 'swipe'
+
+    def __init__(self, min_speed, min_acceleration, rules):
+        """
+        Swipe onset (velocity and acceleration) shared by every rule with
+        the same thresholds; the onset speed is the command magnitude
+
+        Args:
+            rules: dict direction -> GestureRule
+        """
+        self.min_speed = min_speed
+        self.min_acceleration = min_acceleration
+        self.rules = rules
+
+    def detect(self, motion_analyzer):
+        """
+        Returns:
+            tuple (direction, speed) or None
+        """
+        return motion_analyzer.detect_swipe(self.min_speed, self.min_acceleration)
+
+
+class VelocityDetector:
+    kind = 'velocity'
+
+    def __init__(self, min_speed, rules):
+        """
+        Current movement direction above a speed, no onset required
+        """
+        self.min_speed = min_speed
+        self.rules = rules
+
+    def detect(self, motion_analyzer):
+        """
+        Returns:
+            tuple (direction, None) or None
+        """
+        direction = motion_analyzer.get_motion_direction(min_speed=self.min_speed)
+        return (direction, None) if direction is not None else None
+
+
+class GestureConfig:
+    def __init__(self, raw, path=None):
+        """
+        Validated, compiled form of a gesture config
+
+        Everything the per-frame path needs is precomputed here: rules
+        grouped by pose and detector, with a direction -> rule table per
+        detector, and gesture -> action names. Instances are never
+        modified; a reload builds a new one and swaps the reference.
+
+        Args:
+            raw: dict parsed from the JSON file
+            path: File it came from, for messages
+
+        Raises:
+            ValueError: the config is invalid
+        """
+        self.path = path
+        # Kept for traces, so a replay compiles the same config
+        self.raw = _object(raw, 'config')
+        self.version = raw.get('version', 1)
+
+        activation = _object(raw.get('activation', {}), 'activation')
+        self.activation_pose = _string(activation.get('pose', 'ok'), 'activation.pose')
+        self.activation_hold = _number(activation.get('hold', 3.0), 'activation.hold')
+        self.activation_grace = _number(activation.get('grace', 0.3), 'activation.grace')
+        self.warmup = _number(raw.get('warmup', 0.6), 'warmup')
+
+        cooldown = _object(raw.get('cooldown', {}), 'cooldown')
+        self.cooldown_smoothed = _number(cooldown.get('smoothed', 0.5), 'cooldown.smoothed')
+        self.cooldown_raw = _number(cooldown.get('raw', 0.7), 'cooldown.raw')
+
+        volume = _object(raw.get('volume', {}), 'volume')
+        self.volume_gain = _number(volume.get('gain', 0.015), 'volume.gain')
+        self.volume_step = _number(volume.get('step', 0.02), 'volume.step')
+
+        gestures = _object(raw.get('gestures'), 'gestures')
+        if not gestures:
+            raise ValueError("gestures must not be empty")
+
+        # (pose, detector kind, thresholds) -> {direction: rule}
+        groups = {}
+        self.actions = {}
+        for name, spec in gestures.items():
+            where = f"gestures.{name}"
+            spec = _object(spec, where)
+            pose = _string(spec.get('pose', 'open'), f"{where}.pose")
+            detector = spec.get('detector', 'swipe')
+            direction = spec.get('motion')
+            action = spec.get('action', 'none')
+            if direction not in DIRECTIONS:
+                raise ValueError(f"{where}.motion must be one of {', '.join(DIRECTIONS)}")
+            if action not in ACTIONS:
+                raise ValueError(f"{where}.action: unknown action '{action}'")
+
+            if detector == 'swipe':
+                key = (pose, detector,
+                       _number(spec.get('min_speed', 0.8), f"{where}.min_speed"),
+                       _number(spec.get('min_acceleration', 8.0), f"{where}.min_acceleration"))
+            elif detector == 'velocity':
+                key = (pose, detector, _number(spec.get('min_speed', 0.3), f"{where}.min_speed"))
+            else:
+                raise ValueError(f"{where}.detector: unknown detector '{detector}'")
+
+            cooldown = spec.get('cooldown')
+            if cooldown is not None:
+                cooldown = _number(cooldown, f"{where}.cooldown")
+            rule = GestureRule(name, pose, direction, cooldown, action)
+            rules = groups.setdefault(key, {})
+            if direction in rules:
+                raise ValueError(f"{where}: '{rules[direction].name}' already uses that pose and motion")
+            rules[direction] = rule
+            self.actions[name] = action
+
+        # Every pose the engine will be asked to check
+        self.poses = frozenset([self.activation_pose] + [key[0] for key in groups])
+
+        # pose -> detectors, in file order
+        by_pose = {}
+        for key, rules in groups.items():
+            pose, detector = key[0], key[1]
+            if detector == 'swipe':
+                compiled = SwipeDetector(key[2], key[3], rules)
+            else:
+                compiled = VelocityDetector(key[2], rules)
+            by_pose.setdefault(pose, []).append(compiled)
+        self.pose_rules = tuple((pose, tuple(detectors)) for pose, detectors in by_pose.items())
+
+        # Shortest per-gesture cooldown, so a hand still cooling down can
+        # skip the detectors entirely
+        cooldowns = [rule.cooldown for rules in groups.values() for rule in rules.values()
+                     if rule.cooldown is not None]
+        self._min_rule_cooldown = min(cooldowns) if cooldowns else None
+
+        self.players = {}
+        for player, bindings in _object(raw.get('players', {}), 'players').items():
+            where = f"players.{player}"
+            for action, keys in _object(bindings, where).items():
+                if action != 'window' and action not in PLAYER_ACTIONS:
+                    raise ValueError(f"{where}: unknown action '{action}'")
+                if not _string(keys, f"{where}.{action}").strip():
+                    raise ValueError(f"{where}.{action} must not be empty")
+            self.players[player] = dict(bindings)
+
+    def cooldown(self, smoothed):
+        """Default cooldown for engines with or without a landmark filter"""
+        return self.cooldown_smoothed if smoothed else self.cooldown_raw
+
+    def min_cooldown(self, smoothed):
+        """Shortest cooldown any gesture has"""
+        default = self.cooldown(smoothed)
+        if self._min_rule_cooldown is None:
+            return default
+        return min(default, self._min_rule_cooldown)
+
+
+def _object(value, path):
+    if not isinstance(value, dict):
+        raise ValueError(f"{path} must be an object")
+    return value
+
+
+def _string(value, path):
+    if not isinstance(value, str):
+        raise ValueError(f"{path} must be a string")
+    return value
+
+
+def _number(value, path):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{path} must be a number")
+    return float(value)
+
+
+def check_poses(config, known_poses):
+    """
+    Reject configs naming poses nothing can recognize (a typo would
+    otherwise make the gesture silently never fire)
+
+    Args:
+        config: GestureConfig
+        known_poses: Poses with a heuristic or a trained class
+
+    Raises:
+        ValueError: a pose is unknown
+    """
+    unknown = sorted(config.poses - set(known_poses))
+    if unknown:
+        raise ValueError(f"{config.path or 'config'}: unknown pose {', '.join(unknown)} "
+                         f"(known: {', '.join(sorted(known_poses))})")
+
+
+def load_gesture_config(path=None):
+    """
+    Read and compile a gesture config
+
+    Args:
+        path: JSON file; defaults to OKTRIX_GESTURE_CONFIG, then
+            config/gestures.json
+
+    Returns:
+        GestureConfig
+
+    Raises:
+        ValueError: the file is not valid JSON or not a valid config
+    """
+    if path is None:
+        path = os.environ.get('OKTRIX_GESTURE_CONFIG', DEFAULT_CONFIG_PATH)
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            raw = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}") from e
+    try:
+        return GestureConfig(raw, path)
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from e
+
+
+class GestureConfigWatcher:
+    def __init__(self, path, on_change, interval=1.0):
+        """
+        Recompile the config when its file changes
+
+        A background thread polls the file's modification time. A config
+        that fails to load is reported and the previous one stays active.
+
+        Args:
+            path: Config file to watch
+            on_change: callable(GestureConfig), called from the watcher
+                thread; raising ValueError rejects the config
+            interval: Seconds between checks
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+
+        self._mtime = self._read_mtime()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Counters
+        self.reloads = 0
+        self.errors = 0
+
+    def _read_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def start(self):
+        """
+        Returns:
+            self, for chaining
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Reload now if the file changed
+
+        Returns:
+            bool: whether a new config was applied
+        """
+        mtime = self._read_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+
+        # Nothing in a bad file may stop the watcher: the next edit must
+        # still be picked up
+        try:
+            config = load_gesture_config(self.path)
+            self.on_change(config)
+        except Exception as e:
+            self.errors += 1
+            print(f"Gesture config not applied, keeping the previous one: {e}")
+            return False
+
+        self.reloads += 1
+        print(f"Gesture config reloaded: {self.path}")
+        return True
+
+    def get_stats(self):
+        return {'reloads': self.reloads, 'errors': self.errors}
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
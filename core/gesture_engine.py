@@ -4,216 +4,492 @@ Main gesture recognition system combining hand tracking and motion analysis
 """
 
 import time
-import threading
+from .command_executor import CommandExecutor
+from .gesture_config import check_poses, load_gesture_config
 from .hand_tracker import HandTracker
-from .motion_analyzer import MotionAnalyzer
+from .hand_tracks import HandTrackAssigner
+from .landmark_filter import create_landmark_filter
+from .pose_classifier import load_default_classifier
+from .trace import TraceRecorder
+from .tracking_scheduler import TrackingScheduler
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from modules.media_control import MediaController
 
 
 class GestureEngine:
-    def __init__(self):
+    def __init__(self, media_controller=None, adaptive=True, max_hands=1,
+                 landmark_filter='one_euro', metrics=None, pose_classifier='default',
+                 config=None, inference=True):
         """
         Initialize the gesture recognition engine
+        
+        Args:
+            media_controller: object with execute_gesture() and
+                get_next_play_pause_display(); defaults to MediaController.
+                Benchmarks and replays pass a stub here.
+            adaptive: Schedule inference with TrackingScheduler (low-rate
+                downscaled detection while idle, ROI crops while tracking).
+                False runs full-frame inference on every frame.
+            max_hands: Hands tracked at once, each with its own motion
+                buffer, OK-sign hold and cooldown
+            landmark_filter: Per-hand landmark smoothing before gesture
+                logic: 'one_euro', 'kalman' or 'none'
+            metrics: optional PipelineMetrics; media command execution and
+                recognized gestures are recorded there
+            pose_classifier: PoseClassifier for static poses; 'default'
+                loads the trained model if one exists, None keeps the
+                distance heuristics
+            config: GestureConfig (poses, motions, cooldowns, actions);
+                defaults to config/gestures.json. Replace it at runtime
+                with apply_config().
+            inference: Run MediaPipe here. False builds no hand tracking
+                graph: only process_hand_data() is available, for
+                landmarks from the inference worker, camera processes or
+                recordings
         """
+        if pose_classifier == 'default':
+            pose_classifier = load_default_classifier()
         self.hand_tracker = HandTracker(
-            max_hands=1,
+            max_hands=max_hands,
             detection_confidence=0.7,
-            tracking_confidence=0.7
+            tracking_confidence=0.7,
+            pose_classifier=pose_classifier,
+            inference=inference
         )
-        self.motion_analyzer = MotionAnalyzer(buffer_size=5)
+        self.tracking_scheduler = TrackingScheduler(self.hand_tracker) if adaptive and inference else None
+        
+        if config is None:
+            config = load_gesture_config()
+        check_poses(config, self.hand_tracker.known_poses())
+        self.config = config
+        
+        # Per-hand state, one track assigner per stream (camera)
+        self.hand_tracks = {}
+        self.landmark_filter = landmark_filter
 
-        self.media_controller = MediaController()
+        if media_controller is None:
+            # Imported lazily; the platform backend is picked at runtime
+            from modules.media_control import MediaController
+            media_controller = MediaController(config=config)
+        self.media_controller = media_controller
+        
+        # One worker runs media commands in order, merging repeats
+        self.metrics = metrics
+        self.command_executor = CommandExecutor(media_controller.execute_gesture,
+                                                metrics=metrics).start()
 
         # System state
         self.is_active = False
-        self.ok_gesture_start_time = None
-        self.ok_gesture_hold_duration = 3.0  
         
-        # Gesture detection state
+        # Gesture detection state (most recent across all hands; the
+        # cooldown itself is tracked per hand)
         self.last_gesture = None
         self.last_gesture_time = 0
-        self.gesture_cooldown = 0.7  
         
-        # Hand warmup
-        self.hand_detected_since = None
-        self.hand_warmup_delay = 0.6  
+        # Smoothed landmarks don't produce jitter swipes, so the default
+        # cooldown can be shorter than on raw landmarks
+        self.smoothed = landmark_filter not in (None, 'none')
+
+        # Timestamp of the latest processed frame
+        self.clock = time.time()
         
-    def process_frame(self, frame):
+        # TraceRecorder while recording, the config it was started with,
+        # and the requested path and file number (a reload starts a new file)
+        self.recorder = None
+        self._recording_config = None
+        self._recording_path = None
+        self._recording_part = 0
+        
+    def apply_config(self, config):
+        """
+        Switch to another gesture config without restarting
+        
+        Safe to call from another thread (the config watcher): every frame
+        reads the config reference once, so it sees the old or the new
+        config as a whole, never a mix.
+        
+        Args:
+            config: GestureConfig
+        
+        Raises:
+            ValueError: the config uses a pose the hand tracker doesn't
+                know; the current config stays
+        """
+        check_poses(config, self.hand_tracker.known_poses())
+        apply = getattr(self.media_controller, 'apply_config', None)
+        if apply is not None:
+            apply(config)
+        self.config = config
+        
+    def process_frame(self, frame, timings=None, timestamp=None, annotate=True):
         """
         Process a single frame for gesture recognition
         
         Args:
             frame: BGR image from webcam
+            timings: optional dict, filled with seconds spent per stage
+                (tracker stages plus 'environment' and 'gesture_logic')
+            timestamp: Capture time in seconds (defaults to now)
+            annotate: Draw MediaPipe's landmarks on a copy of the frame;
+                False returns annotated_frame None and skips the copies
         
         Returns:
             dict with:
                 - hand_detected: bool
                 - system_active: bool
-                - current_gesture: str or None
+                - current_gesture: str or None (first gesture this frame)
+                - gestures: list of dicts (gesture, track_id, stream_id,
+                  handedness), one per hand that fired
                 - environment_quality: dict
                 - annotated_frame: frame with visual feedback
+                - landmarks: (21, 3) float32 landmark array (or None)
+                - handedness: "Left" or "Right" (or None)
+                - hands: list of dicts (track_id, stream_id, handedness,
+                  landmarks) for every tracked hand
         """
         # Track hand in frame
-        hand_data = self.hand_tracker.process_frame(frame)
+        if self.tracking_scheduler is not None:
+            hand_data = self.tracking_scheduler.process_frame(frame, timings, annotate=annotate)
+        else:
+            hand_data = self.hand_tracker.process_frame(frame, timings, annotate=annotate)
         
         # Check environment quality
+        t0 = time.perf_counter()
         env_quality = self.hand_tracker.check_environment(frame)
+        if timings is not None:
+            timings['environment'] = time.perf_counter() - t0
+        
+        return self.process_hand_data(hand_data, env_quality, timings, timestamp=timestamp)
+    
+    def process_hand_data(self, hand_data, env_quality=None, timings=None, stream_id=0,
+                          timestamp=None):
+        """
+        Run gesture logic on already-tracked hand data
+        
+        Used directly when replaying recorded landmarks, so no camera or
+        MediaPipe inference is needed.
+        
+        Args:
+            hand_data: dict shaped like HandTracker.process_frame() output
+            env_quality: dict from check_environment(), or None if unknown
+            timings: optional dict, 'gesture_logic' seconds is added to it
+            stream_id: Camera the data came from; each stream has its own
+                hand tracks
+            timestamp: Capture time in seconds; defaults to the data's own
+                'timestamp' (recorded landmarks), then to now
         
+        Returns:
+            dict, same as process_frame()
+        """
+        if timestamp is None:
+            timestamp = hand_data.get('timestamp')
+        if timestamp is None:
+            timestamp = time.time()
+        self.clock = timestamp
+        
+        t0 = time.perf_counter()
+        config = self.config
+        recorder = self.recorder
+        if recorder is not None and stream_id == 0 and config is not self._recording_config:
+            # A trace replays with the one config it holds
+            recorder = self._next_recording(config)
+        
+        was_active = self.is_active
+        response = self._update_gestures(hand_data, env_quality, stream_id, timestamp, config)
+        
+        if recorder is not None and stream_id == 0:
+            gestures = [gesture['gesture'] for gesture in response['gestures']]
+            if self.is_active != was_active:
+                gestures.append('system_toggle')
+            recorder.write(timestamp, self._input_hands(hand_data), gestures, was_active)
+        if timings is not None:
+            timings['gesture_logic'] = time.perf_counter() - t0
+        return response
+    
+    def _update_gestures(self, hand_data, env_quality, stream_id, now, config):
+        """
+        Advance activation and gesture state for one frame
+        """
         # Prepare response
         response = {
             'hand_detected': hand_data['detected'],
             'system_active': self.is_active,
             'current_gesture': None,
+            'gestures': [],
             'environment_quality': env_quality,
-            'annotated_frame': hand_data['annotated_frame']
+            'annotated_frame': hand_data.get('annotated_frame'),
+            'landmarks': hand_data['landmarks'],
+            'handedness': hand_data['handedness'],
+            'hands': []
         }
         
-        if not hand_data['detected']:
-            # No hand detected - reset state
-            self.ok_gesture_start_time = None
-            self.hand_detected_since = None
-            self.motion_analyzer.clear_buffer()
-            return response
+        hands = self._input_hands(hand_data)
+        
+        # No hand detected - tracks drop their hold and motion state
+        pairs = self._get_assigner(stream_id).update(hands, now)
+        smoothed = [track.smooth(hand['landmarks'], now) for track, hand in pairs]
+        
+        # Every hand's pose in one batch (no-op with the heuristics)
+        if smoothed:
+            self.hand_tracker.classify_poses(smoothed)
+        
+        for (track, hand), landmarks in zip(pairs, smoothed):
+            response['hands'].append({
+                'track_id': track.track_id,
+                'stream_id': track.stream_id,
+                'handedness': track.handedness,
+                'landmarks': landmarks
+            })
+            self._update_hand(track, landmarks, now, response, config)
+        
+        if response['hands']:
+            response['landmarks'] = response['hands'][0]['landmarks']
+        
+        return response
+    
+    @staticmethod
+    def _input_hands(hand_data):
+        hands = hand_data.get('hands')
+        if hands is None:
+            # Single-hand producers (older recordings) only fill landmarks
+            hands = [{'landmarks': hand_data['landmarks'],
+                      'handedness': hand_data['handedness']}] if hand_data['detected'] else []
+        return hands
+    
+    def _get_assigner(self, stream_id):
+        assigner = self.hand_tracks.get(stream_id)
+        if assigner is None:
+            assigner = HandTrackAssigner(
+                stream_id=stream_id,
+                filter_factory=lambda: create_landmark_filter(self.landmark_filter)
+            )
+            self.hand_tracks[stream_id] = assigner
+        return assigner
+    
+    def _all_tracks(self):
+        for assigner in self.hand_tracks.values():
+            yield from assigner.tracks
+    
+    def _emit_gesture(self, track, gesture_name, response, now, display=None, magnitude=None):
+        """
+        Record a recognized gesture and dispatch its media command
+        
+        Args:
+            magnitude: Swipe speed at onset, normalized units per second
+        """
+        if response['current_gesture'] is None or response['current_gesture'] == 'system_toggle':
+            response['current_gesture'] = gesture_name
+            if display:
+                response['play_pause_display'] = display
+        response['gestures'].append({
+            'gesture': gesture_name,
+            'track_id': track.track_id,
+            'stream_id': track.stream_id,
+            'handedness': track.handedness
+        })
         
-        landmarks = hand_data['landmarks']
+        track.last_gesture = gesture_name
+        track.last_gesture_time = now
+        self.last_gesture = gesture_name
+        self.last_gesture_time = now
+        
+        # Clear buffer after gesture detected
+        track.motion_analyzer.clear_buffer()
+        
+        print(f"Gesture detected: {display or gesture_name.upper()} (hand {track.track_id})")
+        if self.metrics is not None:
+            self.metrics.increment('gestures')
+        
+        # Execute media command
+        self.command_executor.submit(gesture_name, magnitude)
+    
+    def _update_hand(self, track, landmarks, now, response, config):
+        """
+        Gesture logic for one tracked hand
+        """
+        hand_tracker = self.hand_tracker
         
         # Warmup
-        now = time.time()
-        if self.hand_detected_since is None:
-            self.hand_detected_since = now
-        warmup_passed = (now - self.hand_detected_since) >= self.hand_warmup_delay
-        
-        # Check for OK gesture 
-        if self.hand_tracker.is_ok_sign(landmarks):
-            if self.ok_gesture_start_time is None:
+        if track.hand_detected_since is None:
+            track.hand_detected_since = now
+        warmup_passed = (now - track.hand_detected_since) >= config.warmup
+        
+        # Check for the activation pose (OK sign)
+        if hand_tracker.has_pose(landmarks, config.activation_pose):
+            if track.ok_gesture_start_time is None:
                 # Start tracking hold time
-                self.ok_gesture_start_time = time.time()
+                track.ok_gesture_start_time = now
             else:
                 # Check hold duration
-                hold_duration = time.time() - self.ok_gesture_start_time
-                if hold_duration >= self.ok_gesture_hold_duration:
+                hold_duration = now - track.ok_gesture_start_time
+                if hold_duration >= config.activation_hold:
                     # Toggle system state
                     self.is_active = not self.is_active
                     response['current_gesture'] = 'system_toggle'
                     response['system_active'] = self.is_active
                     
-                    # Reset state
-                    self.ok_gesture_start_time = None
-                    self.motion_analyzer.clear_buffer()
+                    # Reset state, any other hand's hold starts over too
+                    for other in self._all_tracks():
+                        other.ok_gesture_start_time = None
+                    track.motion_analyzer.clear_buffer()
                     
                     print(f"System {'ACTIVATED' if self.is_active else 'DEACTIVATED'}")
                     
         else:
             # Reset if gesture is lost
-            if self.ok_gesture_start_time is not None:
+            if track.ok_gesture_start_time is not None:
                 # Allow small interruptions
-                time_since_start = time.time() - self.ok_gesture_start_time
-                if time_since_start > 0.3:  
-                    self.ok_gesture_start_time = None
+                time_since_start = now - track.ok_gesture_start_time
+                if time_since_start > config.activation_grace:
+                    track.ok_gesture_start_time = None
         
         # Process active gestures
-        if self.is_active and warmup_passed:
-            # Track motion
-            self.motion_analyzer.add_position(landmarks)
-            
-            # Check cooldown
-            current_time = time.time()
-            if current_time - self.last_gesture_time < self.gesture_cooldown:
-                return response
-            
-            # Ensure motion is stable
-            if not self.motion_analyzer.is_motion_stable(min_frames=3):
-                return response
-            
-            # Check for swipe gestures
-            if self.hand_tracker.is_hand_open(landmarks):
-                # Analyze motion direction
-                direction = self.motion_analyzer.get_motion_direction(threshold=0.12)
+        if not (self.is_active and warmup_passed):
+            return
+        
+        # Track motion
+        motion_analyzer = track.motion_analyzer
+        motion_analyzer.add_position(landmarks, now)
+        
+        # Check cooldown (the shortest any rule allows; per-rule cooldowns
+        # are checked once a rule matches)
+        since_last = now - track.last_gesture_time
+        default_cooldown = config.cooldown(self.smoothed)
+        if since_last < config.min_cooldown(self.smoothed):
+            return
+        
+        # Ensure motion is stable
+        if not motion_analyzer.is_motion_stable(min_frames=3):
+            return
+        
+        # Compiled rules: pose -> detectors -> direction -> gesture
+        for pose, detectors in config.pose_rules:
+            if not hand_tracker.has_pose(landmarks, pose):
+                continue
+            for detector in detectors:
+                detected = detector.detect(motion_analyzer)
+                if detected is None:
+                    continue
+                direction, speed = detected
+                rule = detector.rules.get(direction)
+                if rule is None:
+                    continue
+                cooldown = rule.cooldown if rule.cooldown is not None else default_cooldown
+                if since_last < cooldown:
+                    continue
                 
-                if direction and direction != "stationary":
-                    
-                    gesture_map = {
-                        "left": "swipe_left",
-                        "right": "swipe_right",
-                        "up": "swipe_up",
-                        "down": "swipe_down"
-                    }
-                    
-                    gesture_name = gesture_map.get(direction)
-                    
-                    if gesture_name:
-                        response['current_gesture'] = gesture_name
-                        self.last_gesture = gesture_name
-                        self.last_gesture_time = current_time
-                        
-                        # Clear buffer after gesture detected
-                        self.motion_analyzer.clear_buffer()
-                        
-                        print(f"Gesture detected: {gesture_name.upper()}")
-
-                        # Execute media command
-                        threading.Thread(
-                            target=self.media_controller.execute_gesture,
-                            args=(gesture_name,),
-                            daemon=True
-                        ).start()
-            
-            # Check for play/pause gesture
-            if self.hand_tracker.is_play_pause_gesture(landmarks):
-                # Check for downward motion
-                direction = self.motion_analyzer.get_motion_direction(threshold=0.05)
-
-                if direction == "down":
-                    play_pause_label = self.media_controller.get_next_play_pause_display()
-                    response['current_gesture'] = 'play_pause'
-                    response['play_pause_display'] = play_pause_label
-                    self.last_gesture = 'play_pause'
-                    self.last_gesture_time = current_time
-            
-                    # Clear buffer after gesture detected
-                    self.motion_analyzer.clear_buffer()
-            
-                    print(f"Gesture detected: {play_pause_label}")
-
-                    # Execute media command
-                    threading.Thread(
-                        target=self.media_controller.execute_gesture,
-                        args=('play_pause',),
-                        daemon=True
-                    ).start()
-
-        return response  
+                display = None
+                if rule.action == 'play_pause':
+                    display = self.media_controller.get_next_play_pause_display()
+                self._emit_gesture(track, rule.name, response, now, display=display,
+                                   magnitude=float(speed) if speed is not None else None)
+                return
     
     def get_activation_progress(self):
         """
         Get progress of OK gesture hold (0.0 to 1.0)
         
+        With several hands, the one closest to completing the hold wins.
+        Measured at the latest processed frame.
+        
         Returns:
             float: progress percentage, or 0 if not holding OK gesture
         """
-        if self.ok_gesture_start_time is None:
+        starts = [track.ok_gesture_start_time for track in self._all_tracks()
+                  if track.ok_gesture_start_time is not None]
+        if not starts:
             return 0.0
         
-        hold_duration = time.time() - self.ok_gesture_start_time
-        progress = min(hold_duration / self.ok_gesture_hold_duration, 1.0)
+        hold_duration = self.clock - min(starts)
+        progress = min(hold_duration / self.config.activation_hold, 1.0)
         return progress
     
+    def start_recording(self, path):
+        """
+        Record every frame's hands, timestamp and gestures (first stream
+        only) to a binary trace, for replay without a camera
+        
+        The trace stores the gesture config it was recorded with. When the
+        config is reloaded, recording continues in a new file (path with
+        -2, -3, ... before the extension); a gesture already under way at
+        the switch may not replay from the new file, which starts without
+        the hand's motion history.
+        
+        Args:
+            path: Output file, e.g. traces/session.oktrace
+        
+        Returns:
+            TraceRecorder
+        """
+        self.stop_recording()
+        self._recording_path = path
+        self._recording_part = 1
+        return self._open_recorder(path, self.config)
+    
+    def _open_recorder(self, path, config):
+        self.recorder = TraceRecorder(
+            path,
+            max_hands=self.hand_tracker.max_hands,
+            metadata={
+                'landmark_filter': self.landmark_filter,
+                'max_hands': self.hand_tracker.max_hands,
+                'gesture_config': config.raw
+            },
+            gestures=('system_toggle',) + tuple(config.actions)
+        )
+        self._recording_config = config
+        print(f"Recording trace: {path}")
+        return self.recorder
+    
+    def _next_recording(self, config):
+        self.stop_recording()
+        self._recording_part += 1
+        root, ext = os.path.splitext(self._recording_path)
+        return self._open_recorder(f"{root}-{self._recording_part}{ext}", config)
+    
+    def stop_recording(self):
+        """
+        Finish the current trace, if any
+        """
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+            print(f"Trace saved: {recorder.path} ({recorder.frames} frames)")
+    
+    def warm_up(self, frames=2):
+        """
+        Prime the MediaPipe graph before the camera starts
+        
+        Returns:
+            float: seconds spent
+        """
+        return self.hand_tracker.warm_up(frames)
+    
+    def reset_tracking(self):
+        """
+        Forget tracked hands and the inference schedule, keeping the
+        system state; used when a stopped engine is started again
+        """
+        self.hand_tracks = {}
+        if self.tracking_scheduler is not None:
+            self.tracking_scheduler.reset()
+    
     def reset(self):
         """
         Reset all gesture engine state
         """
         self.is_active = False
-        self.ok_gesture_start_time = None
         self.last_gesture = None
         self.last_gesture_time = 0
-        self.motion_analyzer.clear_buffer()
+        for assigner in self.hand_tracks.values():
+            assigner.reset()
     
     def release(self):
         """
         Release resources
         """
+        self.stop_recording()
+        self.command_executor.stop()
         self.hand_tracker.release()
@@ -3,13 +3,31 @@ OKTrix Hand Tracker
 Uses MediaPipe to detect and track hand landmarks in real-time
 """
 
+import math
+import time
+
 import cv2
-import mediapipe as mp
 import numpy as np
 
+from .environment import EnvironmentMonitor
+
+
+# Landmark pairs measured once per frame; every pose predicate reads
+# from the same distance vector instead of computing its own
+DISTANCE_PAIRS = np.array([
+    (0, 4), (0, 8), (0, 12), (0, 16), (0, 20),   # wrist -> fingertips
+    (4, 8),                                       # thumb tip -> index tip
+    (4, 5),                                       # thumb tip -> index base
+])
+WRIST_TO_TIPS = slice(0, 5)
+WRIST_TO_OTHER_TIPS = slice(2, 5)                 # middle, ring, pinky
+THUMB_TO_INDEX_TIP = 5
+THUMB_TO_INDEX_BASE = 6
+
 
 class HandTracker:
-    def __init__(self, max_hands=1, detection_confidence=0.8, tracking_confidence=0.7):
+    def __init__(self, max_hands=1, detection_confidence=0.8, tracking_confidence=0.7,
+                 pose_classifier=None, inference=True):
         """
         Initialize MediaPipe Hand Tracking
         
@@ -17,73 +35,133 @@ class HandTracker:
             max_hands: Maximum number of hands to detect
             detection_confidence: Minimum confidence for hand detection
             tracking_confidence: Minimum confidence for hand tracking
+            pose_classifier: optional PoseClassifier; poses it was trained
+                on replace the distance heuristics below
+            inference: Build the MediaPipe graph. False keeps only pose
+                checks and environment analysis, for landmarks tracked
+                elsewhere (inference worker, replays); mediapipe is then
+                never imported
         """
-        self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
-        
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=max_hands,
-            min_detection_confidence=detection_confidence,
-            min_tracking_confidence=tracking_confidence
-        )
+        self.hands = None
+        if inference:
+            import mediapipe as mp
+            
+            self.mp_hands = mp.solutions.hands
+            self.mp_drawing = mp.solutions.drawing_utils
+            self.mp_drawing_styles = mp.solutions.drawing_styles
+            
+            self.hands = self.mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=max_hands,
+                min_detection_confidence=detection_confidence,
+                min_tracking_confidence=tracking_confidence
+            )
         
+        self.max_hands = max_hands
         self.previous_landmarks = None
         
-    def process_frame(self, frame):
+        # Smoothed, low-rate lighting estimate
+        self.environment = EnvironmentMonitor()
+        
+        # Distance vector cache, keyed on the landmark array it was built from
+        self._measured_landmarks = None
+        self._distances = None
+        
+        self.pose_classifier = pose_classifier
+        # Classified pose per landmark array (by id), refreshed by classify_poses()
+        self._poses = {}
+        
+        # Pose name (as used in the gesture config) -> predicate
+        self.pose_predicates = {
+            'any': lambda landmarks: landmarks is not None,
+            'open': self.is_hand_open,
+            'ok': self.is_ok_sign,
+            'play_pause': self.is_play_pause_gesture
+        }
+        
+    def process_frame(self, frame, timings=None, annotate=True):
         """
         Process a single frame to detect hands
         
         Args:
             frame: BGR image from webcam
+            timings: optional dict, filled with seconds spent per stage
+                ('color_conversion', 'inference', 'annotate')
+            annotate: Copy the frame and draw the landmarks on it; False
+                skips both and returns landmarks only
             
         Returns:
             dict with:
                 - detected: bool
-                - landmarks: list of 21 landmark points (or None)
+                - landmarks: (21, 3) float32 array of x, y, z (or None)
                 - handedness: "Left" or "Right" (or None)
-                - annotated_frame: frame with hand landmarks drawn
+                - hands: list of every detected hand, each a dict with
+                  landmarks, handedness and score (first one mirrors
+                  landmarks/handedness above)
+                - annotated_frame: frame with hand landmarks drawn (None
+                  when annotate is False)
         """
+        if self.hands is None:
+            raise RuntimeError("HandTracker was created without inference")
+        
+        t0 = time.perf_counter()
+        
         # Convert BGR to RGB (MediaPipe uses RGB)
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t1 = time.perf_counter()
         
         # Process the frame
         results = self.hands.process(frame_rgb)
+        t2 = time.perf_counter()
         
         # Prepare response
         response = {
             'detected': False,
             'landmarks': None,
             'handedness': None,
-            'annotated_frame': frame.copy()
+            'hands': [],
+            'annotated_frame': frame.copy() if annotate else None
         }
         
         # If hand detected
         if results.multi_hand_landmarks:
-            hand_landmarks = results.multi_hand_landmarks[0]  # Get first hand
-            handedness = results.multi_handedness[0].classification[0].label
-            
-            # Draw landmarks on frame
-            self.mp_drawing.draw_landmarks(
-                response['annotated_frame'],
-                hand_landmarks,
-                self.mp_hands.HAND_CONNECTIONS,
-                self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                self.mp_drawing_styles.get_default_hand_connections_style()
-            )
-            
-            # Convert landmarks to list of (x, y, z) tuples
-            landmarks_list = []
-            for landmark in hand_landmarks.landmark:
-                landmarks_list.append((landmark.x, landmark.y, landmark.z))
+            for hand_landmarks, classification in zip(results.multi_hand_landmarks,
+                                                      results.multi_handedness):
+                # Draw landmarks on frame
+                if annotate:
+                    self.mp_drawing.draw_landmarks(
+                        response['annotated_frame'],
+                        hand_landmarks,
+                        self.mp_hands.HAND_CONNECTIONS,
+                        self.mp_drawing_styles.get_default_hand_landmarks_style(),
+                        self.mp_drawing_styles.get_default_hand_connections_style()
+                    )
+                
+                # Convert landmarks to a (21, 3) array
+                landmarks = np.array(
+                    [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark],
+                    dtype=np.float32
+                )
+                
+                response['hands'].append({
+                    'landmarks': landmarks,
+                    'handedness': classification.classification[0].label,
+                    'score': classification.classification[0].score
+                })
             
+            first = response['hands'][0]
             response['detected'] = True
-            response['landmarks'] = landmarks_list
-            response['handedness'] = handedness
+            response['landmarks'] = first['landmarks']
+            response['handedness'] = first['handedness']
             
             # Store for motion tracking
-            self.previous_landmarks = landmarks_list
+            self.previous_landmarks = first['landmarks']
+        
+        if timings is not None:
+            timings['color_conversion'] = t1 - t0
+            timings['inference'] = t2 - t1
+            if annotate:
+                timings['annotate'] = time.perf_counter() - t2
         
         return response
     
@@ -92,7 +170,7 @@ class HandTracker:
         Get specific landmark by ID
         
         Args:
-            landmarks: list of landmarks from process_frame
+            landmarks: (21, 3) landmark array from process_frame
             landmark_id: int (0-20)
                 - 0: Wrist
                 - 4: Thumb tip
@@ -104,7 +182,7 @@ class HandTracker:
         Returns:
             tuple (x, y, z) or None
         """
-        if landmarks and 0 <= landmark_id < len(landmarks):
+        if landmarks is not None and 0 <= landmark_id < len(landmarks):
             return landmarks[landmark_id]
         return None
     
@@ -122,11 +200,86 @@ class HandTracker:
         if point1 is None or point2 is None:
             return 0
         
-        return np.sqrt(
-            (point1[0] - point2[0])**2 +
-            (point1[1] - point2[1])**2 +
-            (point1[2] - point2[2])**2
-        )
+        # math on three floats beats building a NumPy scalar
+        return math.dist(point1, point2)
+    
+    def measure(self, landmarks):
+        """
+        Distances for every landmark pair in DISTANCE_PAIRS
+        
+        Computed in one vectorized pass and cached for the current
+        landmark array, so all predicates for a frame share it.
+        
+        Args:
+            landmarks: (21, 3) landmark array
+        
+        Returns:
+            float32 array aligned with DISTANCE_PAIRS
+        """
+        if landmarks is not self._measured_landmarks:
+            points = np.asarray(landmarks, dtype=np.float32)
+            deltas = points[DISTANCE_PAIRS[:, 0]] - points[DISTANCE_PAIRS[:, 1]]
+            self._distances = np.sqrt(np.einsum('ij,ij->i', deltas, deltas))
+            self._measured_landmarks = landmarks
+        return self._distances
+    
+    def classify_poses(self, hands_landmarks):
+        """
+        Classify every hand of a frame in one batch
+        
+        The results are cached for the predicates below; without a pose
+        classifier this does nothing.
+        
+        Args:
+            hands_landmarks: list of (21, 3) landmark arrays
+        
+        Returns:
+            list of pose names (None for no known pose), or None without a
+            classifier
+        """
+        if self.pose_classifier is None:
+            return None
+        poses = self.pose_classifier.predict(hands_landmarks)
+        self._poses = {id(landmarks): (landmarks, pose)
+                       for landmarks, pose in zip(hands_landmarks, poses)}
+        return poses
+    
+    def _classified(self, landmarks, pose):
+        """
+        Classifier verdict for one pose, or None to use the heuristic
+        """
+        if self.pose_classifier is None or pose not in self.pose_classifier.classes:
+            return None
+        cached = self._poses.get(id(landmarks))
+        if cached is None or cached[0] is not landmarks:
+            self.classify_poses([landmarks])
+            cached = self._poses[id(landmarks)]
+        return cached[1] == pose
+    
+    def known_poses(self):
+        """
+        Returns:
+            set of pose names has_pose() can recognize
+        """
+        poses = set(self.pose_predicates)
+        if self.pose_classifier is not None:
+            poses.update(self.pose_classifier.classes)
+        return poses
+    
+    def has_pose(self, landmarks, pose):
+        """
+        Check a pose by name
+        
+        Poses without a built-in heuristic are only recognized by the pose
+        classifier.
+        
+        Returns:
+            bool
+        """
+        predicate = self.pose_predicates.get(pose)
+        if predicate is not None:
+            return predicate(landmarks)
+        return landmarks is not None and bool(self._classified(landmarks, pose))
     
     def is_hand_open(self, landmarks):
         """
@@ -137,57 +290,42 @@ class HandTracker:
         Returns:
             bool
         """
-        if not landmarks:
+        if landmarks is None:
             return False
         
-        wrist = self.get_landmark(landmarks, 0)
-        thumb_tip = self.get_landmark(landmarks, 4)
-        index_tip = self.get_landmark(landmarks, 8)
-        middle_tip = self.get_landmark(landmarks, 12)
-        ring_tip = self.get_landmark(landmarks, 16)
-        pinky_tip = self.get_landmark(landmarks, 20)
-        
-        # Calculate distances from wrist to fingertips
-        distances = [
-            self.calculate_distance(wrist, thumb_tip),
-            self.calculate_distance(wrist, index_tip),
-            self.calculate_distance(wrist, middle_tip),
-            self.calculate_distance(wrist, ring_tip),
-            self.calculate_distance(wrist, pinky_tip)
-        ]
-        
-        # Hand is open if average distance > threshold
-        avg_distance = np.mean(distances)
-        return avg_distance > 0.3  
+        classified = self._classified(landmarks, 'open')
+        if classified is not None:
+            return classified
+        
+        # Hand is open if average wrist-to-fingertip distance > threshold
+        distances = self.measure(landmarks)
+        return bool(distances[WRIST_TO_TIPS].mean() > 0.3)
     
     def is_ok_sign(self, landmarks):
-        if not landmarks:
+        """
+        Detect the OK sign
+        
+        Logic: Thumb and index tips touching, at least one of the other
+        fingers extended
+        
+        Returns:
+            bool
+        """
+        if landmarks is None:
             return False
-    
-        wrist = self.get_landmark(landmarks, 0)
-        thumb_tip = self.get_landmark(landmarks, 4)
-        index_tip = self.get_landmark(landmarks, 8)
-        middle_tip = self.get_landmark(landmarks, 12)
-        ring_tip = self.get_landmark(landmarks, 16)
-        pinky_tip = self.get_landmark(landmarks, 20)
-    
-        # 1. Thumb and index distance
-        thumb_index_distance = self.calculate_distance(thumb_tip, index_tip)
         
-    
-        if thumb_index_distance > 0.06:
+        classified = self._classified(landmarks, 'ok')
+        if classified is not None:
+            return classified
+        
+        distances = self.measure(landmarks)
+        
+        # 1. Thumb and index distance
+        if distances[THUMB_TO_INDEX_TIP] > 0.06:
             return False
-    
-        # 2. Count extended fingers
-        fingers_extended = 0
-        other_fingers = [middle_tip, ring_tip, pinky_tip]
-        for finger_tip in other_fingers:
-            distance = self.calculate_distance(wrist, finger_tip)
-            if distance > 0.38:
-                fingers_extended += 3
-       
-    
-        return fingers_extended >= 1
+        
+        # 2. Any other finger extended
+        return bool((distances[WRIST_TO_OTHER_TIPS] > 0.38).any())
     
     def is_play_pause_gesture(self, landmarks):
         """
@@ -198,45 +336,58 @@ class HandTracker:
         Returns:
             bool
         """
-        if not landmarks:
+        if landmarks is None:
             return False
     
-        thumb_tip = self.get_landmark(landmarks, 4)
-        index_base = self.get_landmark(landmarks, 5) 
+        classified = self._classified(landmarks, 'play_pause')
+        if classified is not None:
+            return classified
     
         # Thumb tip must be close to index base
-        distance = self.calculate_distance(thumb_tip, index_base)
+        return bool(self.measure(landmarks)[THUMB_TO_INDEX_BASE] < 0.06)
     
-        return distance < 0.06
     def check_environment(self, frame):
         """
         Check if lighting conditions are adequate
         
+        Measured on a strided view every few frames and smoothed (see
+        EnvironmentMonitor); the frames in between return the last estimate.
+        
         Returns:
             dict with:
-                - quality: "good", "dark", "bright"
+                - quality: "good", "dark", "bright", "backlit"
                 - brightness: int (0-255)
+                - shadows, highlights: fractions of the frame
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return self.environment.update(frame)
+    
+    def warm_up(self, frames=2, shape=(480, 640, 3)):
+        """
+        Run blank frames through the graph so the first camera frame
+        doesn't pay for delegate setup and first-run allocations
         
-        # Calculate average brightness
-        brightness = np.mean(gray)
+        Blank frames only exercise palm detection; the landmark model
+        first runs when a hand appears.
         
-        if brightness < 50:
-            quality = "dark"
-        elif brightness > 200:
-            quality = "bright"
-        else:
-            quality = "good"
+        Args:
+            frames: Number of blank frames
+            shape: Frame shape, match the camera to warm the right sizes
         
-        return {
-            'quality': quality,
-            'brightness': int(brightness)
-        }
+        Returns:
+            float: seconds spent (0 without inference)
+        """
+        if self.hands is None:
+            return 0.0
+        t0 = time.perf_counter()
+        blank = np.zeros(shape, dtype=np.uint8)
+        for _ in range(frames):
+            self.process_frame(blank)
+        self.previous_landmarks = None
+        return time.perf_counter() - t0
     
     def release(self):
         """
         Release MediaPipe resources
         """
-        self.hands.close()
+        if self.hands is not None:
+            self.hands.close()
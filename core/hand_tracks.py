@@ -0,0 +1,161 @@
+"""
+OKTrix Hand Tracks
+Stable per-hand identities across frames, each with its own gesture state
+"""
+
+import itertools
+
+import numpy as np
+
+from .motion_analyzer import MotionAnalyzer
+
+
+# Shared across all streams so IDs stay unique with several cameras
+_track_ids = itertools.count(1)
+
+
+class HandTrack:
+    def __init__(self, handedness, stream_id=0, buffer_size=16, landmark_filter=None):
+        """
+        Gesture state for one physical hand
+
+        Args:
+            handedness: "Left" or "Right"
+            stream_id: Camera / stream the hand was seen on
+            buffer_size: Motion buffer length for this hand
+            landmark_filter: callable(landmarks, timestamp) smoothing this
+                hand's landmarks, or None
+        """
+        self.track_id = next(_track_ids)
+        self.stream_id = stream_id
+        self.handedness = handedness
+        self.motion_analyzer = MotionAnalyzer(buffer_size=buffer_size)
+        self.landmark_filter = landmark_filter
+
+        self.landmarks = None
+        self.last_seen = None
+        self.visible = False
+
+        # Per-hand gesture state
+        self.ok_gesture_start_time = None
+        self.hand_detected_since = None
+        self.last_gesture = None
+        self.last_gesture_time = 0
+
+    @property
+    def wrist(self):
+        return self.landmarks[0, :2] if self.landmarks is not None else None
+
+    def lose(self):
+        """
+        Hand disappeared this frame: drop hold and motion state but keep
+        the ID (and cooldown) in case it comes straight back
+        """
+        self.visible = False
+        self.ok_gesture_start_time = None
+        self.hand_detected_since = None
+        self.motion_analyzer.clear_buffer()
+        if self.landmark_filter is not None:
+            # Don't smooth a reappearing hand toward where it vanished
+            self.landmark_filter.reset()
+
+    def smooth(self, landmarks, now):
+        """
+        Landmarks after this hand's filter (unchanged without one)
+        """
+        if self.landmark_filter is None:
+            return landmarks
+        return self.landmark_filter(landmarks, now)
+
+    def reset(self):
+        self.ok_gesture_start_time = None
+        self.last_gesture = None
+        self.last_gesture_time = 0
+        self.motion_analyzer.clear_buffer()
+
+
+class HandTrackAssigner:
+    def __init__(self, stream_id=0, max_distance=0.25, lost_timeout=0.5, buffer_size=16,
+                 filter_factory=None):
+        """
+        Match each frame's detected hands to existing tracks
+
+        Matching is by handedness first, then nearest wrist position.
+
+        Args:
+            stream_id: Stream these tracks belong to
+            max_distance: Largest wrist jump (normalized units) that still
+                counts as the same hand
+            lost_timeout: Seconds an unmatched track keeps its ID
+            buffer_size: Motion buffer length for new tracks
+            filter_factory: callable returning a landmark filter for each
+                new track, or None for raw landmarks
+        """
+        self.stream_id = stream_id
+        self.max_distance = max_distance
+        self.lost_timeout = lost_timeout
+        self.buffer_size = buffer_size
+        self.filter_factory = filter_factory
+        self.tracks = []
+
+    def update(self, hands, now):
+        """
+        Assign detected hands to tracks
+
+        Args:
+            hands: list of dicts with 'landmarks' and 'handedness'
+            now: timestamp in seconds
+
+        Returns:
+            list of (track, hand) pairs, in detection order
+        """
+        assigned = [None] * len(hands)
+        free_tracks = set(range(len(self.tracks)))
+
+        if hands and self.tracks:
+            wrists = np.array([hand['landmarks'][0, :2] for hand in hands])
+            candidates = []
+            for t, track in enumerate(self.tracks):
+                if track.landmarks is None:
+                    continue
+                distances = np.linalg.norm(wrists - track.wrist, axis=1)
+                for h, distance in enumerate(distances):
+                    if hands[h]['handedness'] == track.handedness and distance <= self.max_distance:
+                        candidates.append((distance, t, h))
+
+            # Greedy nearest-first matching
+            for distance, t, h in sorted(candidates):
+                if assigned[h] is None and t in free_tracks:
+                    assigned[h] = self.tracks[t]
+                    free_tracks.discard(t)
+
+        pairs = []
+        for h, hand in enumerate(hands):
+            track = assigned[h]
+            if track is None:
+                landmark_filter = self.filter_factory() if self.filter_factory else None
+                track = HandTrack(hand['handedness'], self.stream_id, self.buffer_size,
+                                  landmark_filter)
+                self.tracks.append(track)
+            track.landmarks = hand['landmarks']
+            track.last_seen = now
+            track.visible = True
+            pairs.append((track, hand))
+
+        # Unmatched tracks lose their state now and their ID after a grace period
+        matched = {id(track) for track, _ in pairs}
+        survivors = []
+        for track in self.tracks:
+            if id(track) not in matched:
+                if track.visible:
+                    track.lose()
+                if now - track.last_seen > self.lost_timeout:
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        return pairs
+
+    def reset(self):
+        for track in self.tracks:
+            track.reset()
@@ -0,0 +1,271 @@
+"""
+OKTrix Inference Worker
+Runs MediaPipe hand inference in a separate process; frames travel
+through a shared memory ring buffer, landmarks come back over a queue
+"""
+
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+RESET = 'reset'
+
+
+class SharedFrameRing:
+    def __init__(self, slots, shape, name=None, create=True):
+        """
+        Fixed number of frame-sized slots in one shared memory block
+
+        Args:
+            slots: Number of frames the ring holds
+            shape: Frame shape, e.g. (480, 640, 3)
+            name: Existing block to attach to (create=False)
+            create: Allocate a new block
+        """
+        self.slots = slots
+        self.shape = tuple(shape)
+        size = slots * int(np.prod(self.shape))
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        # Drop the view before closing, the buffer can't be released while exported
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def inference_worker(ring_name, slots, shape, max_hands, adaptive, requests, results, ready):
+    """
+    Worker process body
+
+    Args:
+        ring_name: Shared memory block holding the frame ring
+        slots, shape: Ring layout
+        max_hands: Hands tracked
+        adaptive: Use TrackingScheduler for idle skipping and ROI crops
+        requests: Queue of (slot, sequence, timestamp), RESET to drop
+            tracking state, None to stop
+        results: Queue receiving (sequence, slot, timestamp, hand_data,
+            env_quality, timings)
+        ready: Event set once the model is loaded and warmed up
+    """
+    results.cancel_join_thread()
+
+    from .hand_tracker import HandTracker
+    from .tracking_scheduler import TrackingScheduler
+
+    ring = SharedFrameRing(slots, shape, name=ring_name, create=False)
+    tracker = HandTracker(
+        max_hands=max_hands,
+        detection_confidence=0.7,
+        tracking_confidence=0.7
+    )
+    scheduler = TrackingScheduler(tracker) if adaptive else None
+    tracker.warm_up(shape=shape)
+    ready.set()
+
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            if request == RESET:
+                if scheduler is not None:
+                    scheduler.reset()
+                continue
+
+            slot, sequence, timestamp = request
+            frame = ring.frames[slot]
+
+            timings = {}
+            hand_data = (scheduler or tracker).process_frame(frame, timings, annotate=False)
+            t0 = time.perf_counter()
+            env_quality = tracker.check_environment(frame)
+            timings['environment'] = time.perf_counter() - t0
+
+            # Landmarks only
+            hand_data.pop('annotated_frame', None)
+            results.put((sequence, slot, timestamp, hand_data, env_quality, timings))
+    finally:
+        tracker.release()
+        ring.close()
+
+
+class InferenceWorker:
+    def __init__(self, frame_shape=(480, 640, 3), slots=3, max_hands=1, adaptive=True):
+        """
+        Hand inference in its own process, off the server's GIL
+
+        Frames are copied into a free ring slot and only the slot index is
+        queued, so no image is pickled. The worker has a single HandTracker
+        and sees frames in order, which keeps MediaPipe's tracking state
+        valid; throughput comes from overlapping inference with capture,
+        gesture logic, encoding and Socket.IO in the parent.
+
+        Args:
+            frame_shape: Shape of ring slots; other frame sizes are resized
+            slots: Frames in flight at once; submit() drops when all are busy
+            max_hands: Hands tracked
+            adaptive: Use the adaptive tracking scheduler in the worker
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.max_hands = max_hands
+        self.adaptive = adaptive
+
+        self._context = multiprocessing.get_context('spawn')
+        self.ring = None
+        self.requests = None
+        self.results = None
+        self.process = None
+
+        self._free_slots = queue.SimpleQueue()
+        self._sequence = 0
+        # Results for frames submitted before the last reset() are dropped
+        self._first_valid = 0
+        self._ready = self._context.Event()
+
+        # Counters
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self.frames_completed = 0
+
+    def start(self):
+        """
+        Allocate the ring and start the worker process
+
+        Returns:
+            self, for chaining
+        """
+        if self.process is not None:
+            return self
+
+        self.ring = SharedFrameRing(self.slots, self.frame_shape)
+        self._ready.clear()
+        self.requests = self._context.Queue()
+        self.results = self._context.Queue()
+        self._free_slots = queue.SimpleQueue()
+        for slot in range(self.slots):
+            self._free_slots.put(slot)
+
+        self.process = self._context.Process(
+            target=inference_worker,
+            args=(self.ring.name, self.slots, self.frame_shape, self.max_hands,
+                  self.adaptive, self.requests, self.results, self._ready),
+            daemon=True
+        )
+        self.process.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """
+        Block until the worker has loaded and warmed up its model
+
+        Returns:
+            bool: True if ready, False on timeout or if the process exited
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._ready.wait(0.2):
+            if not self.is_alive():
+                return self._ready.is_set()
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def reset(self):
+        """
+        Start a new session on a running worker: results still in flight
+        are dropped and the worker's tracking schedule starts over
+        """
+        self._first_valid = self._sequence + 1
+        self.requests.put(RESET)
+
+    def submit(self, frame, timestamp=None):
+        """
+        Queue a frame for inference
+
+        Args:
+            frame: BGR image
+            timestamp: Capture time, returned with the result
+
+        Returns:
+            bool: False if every slot was busy and the frame was dropped
+        """
+        try:
+            slot = self._free_slots.get_nowait()
+        except queue.Empty:
+            self.frames_dropped += 1
+            return False
+
+        if frame.shape != self.frame_shape:
+            import cv2
+            frame = cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]))
+        np.copyto(self.ring.frames[slot], frame)
+
+        self._sequence += 1
+        self.frames_submitted += 1
+        self.requests.put((slot, self._sequence, timestamp if timestamp is not None else time.time()))
+        return True
+
+    def read(self, timeout=1.0):
+        """
+        Next inference result, in submission order
+
+        Returns:
+            tuple (timestamp, hand_data, env_quality, timings), or None on
+            timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                sequence, slot, timestamp, hand_data, env_quality, timings = self.results.get(
+                    timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                return None
+
+            self._free_slots.put(slot)
+            if sequence >= self._first_valid:
+                break
+
+        self.frames_completed += 1
+        hand_data['annotated_frame'] = None
+        return timestamp, hand_data, env_quality, timings
+
+    def get_stats(self):
+        return {
+            'frames_submitted': self.frames_submitted,
+            'frames_dropped': self.frames_dropped,
+            'frames_completed': self.frames_completed
+        }
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self):
+        """
+        Stop the worker and free the shared memory
+        """
+        if self.process is None:
+            return
+
+        self.requests.put(None)
+        self.process.join(timeout=3.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+
+        self.ring.close()
+        self.ring.unlink()
+        self.ring = None
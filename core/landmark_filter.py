@@ -0,0 +1,164 @@
+"""
+OKTrix Landmark Filters
+Per-hand smoothing of all 21 landmarks between HandTracker and the
+gesture logic, vectorized over every coordinate
+"""
+
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff=1.5, beta=6.0, d_cutoff=1.0):
+        """
+        One Euro filter (Casiez et al.) on a whole landmark array
+
+        A low-pass filter whose cutoff rises with speed: a resting hand is
+        smoothed heavily, a fast swipe passes with little lag. Every
+        coordinate has its own cutoff, computed in one array operation.
+
+        Args:
+            min_cutoff: Cutoff (Hz) at rest; lower removes more jitter
+            beta: Cutoff increase per unit of speed (normalized units/s);
+                higher reduces lag on fast moves
+            d_cutoff: Cutoff (Hz) for the speed estimate
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._speed = None
+        self._timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, landmarks, timestamp):
+        """
+        Args:
+            landmarks: (21, 3) landmark array
+            timestamp: seconds
+
+        Returns:
+            (21, 3) float32 filtered landmarks
+        """
+        x = np.asarray(landmarks, dtype=np.float64)
+
+        if self._value is None or timestamp <= self._timestamp:
+            self._value = x.copy()
+            self._speed = np.zeros_like(x)
+            self._timestamp = timestamp
+            return x.astype(np.float32)
+
+        dt = timestamp - self._timestamp
+        self._timestamp = timestamp
+
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._speed += a_d * ((x - self._value) / dt - self._speed)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._speed)
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        a = 1.0 / (1.0 + tau / dt)
+        self._value += a * (x - self._value)
+
+        return self._value.astype(np.float32)
+
+
+class KalmanFilter:
+    def __init__(self, process_noise=10.0, measurement_noise=3e-4):
+        """
+        Constant-velocity Kalman filter, one independent filter per
+        coordinate, all updated together
+
+        State per coordinate is (position, velocity) with a 2x2
+        covariance; the covariance entries are kept as arrays so the
+        predict/update steps are plain element-wise math.
+
+        Args:
+            process_noise: Acceleration variance ((units/s^2)^2); higher
+                follows fast moves more closely
+            measurement_noise: Landmark jitter variance (units^2); set
+                above the true jitter so single-frame glitches are damped
+        """
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._v = None
+        self._p00 = self._p01 = self._p11 = None
+        self._timestamp = None
+
+    def __call__(self, landmarks, timestamp):
+        """
+        Args:
+            landmarks: (21, 3) landmark array
+            timestamp: seconds
+
+        Returns:
+            (21, 3) float32 filtered landmarks
+        """
+        z = np.asarray(landmarks, dtype=np.float64)
+
+        if self._x is None or timestamp <= self._timestamp:
+            self._x = z.copy()
+            self._v = np.zeros_like(z)
+            self._p00 = np.full_like(z, self.r)
+            self._p01 = np.zeros_like(z)
+            self._p11 = np.full_like(z, 1.0)
+            self._timestamp = timestamp
+            return z.astype(np.float32)
+
+        dt = timestamp - self._timestamp
+        self._timestamp = timestamp
+
+        # Predict: x += v*dt, P = F P F^T + Q (white acceleration noise)
+        self._x += self._v * dt
+        p00 = self._p00 + dt * (2.0 * self._p01 + dt * self._p11) + self.q * dt ** 4 / 4.0
+        p01 = self._p01 + dt * self._p11 + self.q * dt ** 3 / 2.0
+        p11 = self._p11 + self.q * dt ** 2
+
+        # Update with the measured position
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        residual = z - self._x
+        self._x += k0 * residual
+        self._v += k1 * residual
+
+        self._p00 = (1.0 - k0) * p00
+        self._p01 = (1.0 - k0) * p01
+        self._p11 = p11 - k1 * p01
+
+        return self._x.astype(np.float32)
+
+
+FILTERS = {
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanFilter
+}
+
+
+def create_landmark_filter(kind, **params):
+    """
+    Build a landmark filter by name
+
+    Args:
+        kind: 'one_euro', 'kalman', or 'none' / None for raw landmarks
+        **params: passed to the filter class
+
+    Returns:
+        callable(landmarks, timestamp) -> landmarks, or None
+    """
+    if kind in (None, 'none'):
+        return None
+    if kind not in FILTERS:
+        raise ValueError(f"Unknown landmark filter: {kind}")
+    return FILTERS[kind](**params)
@@ -0,0 +1,200 @@
+"""
+OKTrix Pipeline Metrics
+Always-on per-stage timers with rolling histograms, for the
+'metrics_update' event and the /metrics endpoint
+"""
+
+import bisect
+import collections
+import contextlib
+import threading
+import time
+
+
+# Histogram bucket upper bounds in milliseconds, dense around a 30 fps
+# frame budget (33.3 ms)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 16.7, 25.0, 33.3, 50.0, 100.0, 250.0, 1000.0)
+
+
+class StageMetrics:
+    def __init__(self, window=512):
+        """
+        Durations of one pipeline stage
+
+        The last `window` samples feed the rolling histogram and
+        percentiles; count, sum and cumulative buckets cover the whole run.
+
+        Args:
+            window: Recent samples kept
+        """
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.total_buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.total_buckets[bisect.bisect_left(BUCKETS_MS, seconds * 1000.0)] += 1
+
+    def summary(self):
+        """
+        Returns:
+            dict with count, mean and percentiles in milliseconds over the
+            recent window, and bucket counts aligned with BUCKETS_MS (the
+            last bucket is everything slower)
+        """
+        ms = sorted(seconds * 1000.0 for seconds in self.samples)
+        buckets = [0] * (len(BUCKETS_MS) + 1)
+        for value in ms:
+            buckets[bisect.bisect_left(BUCKETS_MS, value)] += 1
+
+        summary = {'count': self.count, 'window': len(ms), 'buckets': buckets}
+        if ms:
+            summary.update({
+                'mean_ms': round(sum(ms) / len(ms), 3),
+                'p50_ms': round(_percentile(ms, 50), 3),
+                'p95_ms': round(_percentile(ms, 95), 3),
+                'p99_ms': round(_percentile(ms, 99), 3),
+                'max_ms': round(ms[-1], 3)
+            })
+        return summary
+
+
+def _percentile(ordered, percent):
+    """Linear-interpolated percentile of an already sorted list"""
+    position = (len(ordered) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class PipelineMetrics:
+    def __init__(self, window=512):
+        """
+        Stage timers and event counters shared by the pipeline threads
+
+        Recording is a lock and a deque append, cheap enough to leave on
+        in production; histograms and percentiles are only computed when
+        a snapshot is taken.
+
+        Args:
+            window: Recent samples kept per stage
+        """
+        self.window = window
+        self.stages = {}
+        self.counters = collections.Counter()
+        self.gauges = {}
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """
+        Add one duration to a stage
+
+        Args:
+            stage: Stage name, e.g. 'capture', 'inference', 'encode'
+            seconds: Duration measured with a monotonic clock
+        """
+        with self._lock:
+            metrics = self.stages.get(stage)
+            if metrics is None:
+                metrics = self.stages[stage] = StageMetrics(self.window)
+            metrics.add(seconds)
+
+    def record_timings(self, timings):
+        """
+        Add every stage of a timings dict (as filled by
+        GestureEngine.process_frame() or the inference worker)
+        """
+        for stage, seconds in timings.items():
+            self.record(stage, seconds)
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        """
+        Time a block:
+
+            with metrics.time('encode'):
+                ...
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def increment(self, counter, amount=1):
+        """Count an event such as a loop error or a recognized gesture"""
+        with self._lock:
+            self.counters[counter] += amount
+
+    def set_gauge(self, gauge, value):
+        """Set a current value such as a queue depth"""
+        with self._lock:
+            self.gauges[gauge] = value
+
+    def snapshot(self):
+        """
+        Returns:
+            dict with uptime, bucket bounds, per-stage summaries, counters
+            and gauges
+        """
+        with self._lock:
+            stages = {stage: metrics.summary() for stage, metrics in self.stages.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        return {
+            'uptime': round(time.monotonic() - self.started_at, 3),
+            'buckets_ms': list(BUCKETS_MS),
+            'stages': stages,
+            'counters': counters,
+            'gauges': gauges
+        }
+
+    def to_prometheus(self, prefix='oktrix'):
+        """
+        Snapshot in the Prometheus text exposition format
+
+        Stage histograms are cumulative over the whole run, as Prometheus
+        expects; use snapshot() for the rolling window.
+
+        Returns:
+            str
+        """
+        with self._lock:
+            stages = {stage: (list(metrics.total_buckets), metrics.total, metrics.count)
+                      for stage, metrics in self.stages.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+
+        name = f'{prefix}_stage_seconds'
+        lines = [f'# HELP {name} Pipeline stage duration',
+                 f'# TYPE {name} histogram']
+        for stage, (buckets, total, count_total) in sorted(stages.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS_MS + (float('inf'),), buckets):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound / 1000.0:g}'
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count_total}')
+
+        for counter, value in sorted(counters.items()):
+            lines.append(f'# TYPE {prefix}_{counter}_total counter')
+            lines.append(f'{prefix}_{counter}_total {value}')
+
+        for gauge, value in sorted(gauges.items()):
+            lines.append(f'# TYPE {prefix}_{gauge} gauge')
+            lines.append(f'{prefix}_{gauge} {value}')
+
+        lines.append(f'# TYPE {prefix}_uptime_seconds gauge')
+        lines.append(f'{prefix}_uptime_seconds {time.monotonic() - self.started_at:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = collections.Counter()
+            self.gauges = {}
@@ -3,99 +3,235 @@ OKTrix Motion Analyzer
 Detects directional movement of hand gestures (left, right, up, down)
 """
 
+import time
+
 import numpy as np
-from collections import deque
 
 
 class MotionAnalyzer:
-    def __init__(self, buffer_size=5):
+    def __init__(self, buffer_size=16, window=0.075):
         """
         Initialize motion tracking
-        
+
+        Wrist positions go into a preallocated ring buffer together with
+        their timestamps, so velocities are in normalized units per second
+        and thresholds don't depend on the frame rate.
+
         Args:
-            buffer_size: Number of frames to analyze for motion
+            buffer_size: Number of timestamped positions kept
+            window: Seconds of history behind the instantaneous velocity
+                (3 frames at 30 fps, 5 at 60 fps)
         """
         self.buffer_size = buffer_size
-        self.position_buffer = deque(maxlen=buffer_size)
-        
-    def add_position(self, landmarks):
+        self.window = window
+        self._times = np.zeros(buffer_size)
+        self._positions = np.zeros((buffer_size, 2))
+        self._index = 0
+        self._count = 0
+
+    def add_position(self, landmarks, timestamp=None):
         """
         Add current hand position to buffer
-        
+
         Args:
-            landmarks: list of 21 landmarks from HandTracker
+            landmarks: (21, 3) landmark array from HandTracker
+            timestamp: Frame time in seconds (defaults to now)
         """
-        if not landmarks:
+        if landmarks is None:
             return
-        
 
-        wrist = landmarks[0]
-        self.position_buffer.append(wrist)
-    
+        if timestamp is None:
+            timestamp = time.time()
+
+        self._times[self._index] = timestamp
+        self._positions[self._index] = landmarks[0, :2]
+        self._index = (self._index + 1) % self.buffer_size
+        self._count = min(self._count + 1, self.buffer_size)
+
+    def _window(self, window=None, end=None):
+        """
+        Buffered samples from the last `window` seconds, in time order
+
+        Args:
+            window: Seconds of history (defaults to self.window)
+            end: Window ends at this timestamp instead of the newest sample
+
+        Returns:
+            tuple (times, positions) arrays
+        """
+        window = self.window if window is None else window
+        order = (self._index - self._count + np.arange(self._count)) % self.buffer_size
+        times = self._times[order]
+        positions = self._positions[order]
+        if end is not None:
+            last = np.searchsorted(times, end + 1e-6)
+            times, positions = times[:last], positions[:last]
+        if len(times):
+            first = np.searchsorted(times, times[-1] - window - 1e-6)
+            times, positions = times[first:], positions[first:]
+        return times, positions
+
+    @staticmethod
+    def _fit_velocity(times, positions):
+        """Least-squares slope of x and y against time"""
+        if len(times) < 2:
+            return None
+        centered = times - times.mean()
+        denominator = np.dot(centered, centered)
+        if denominator <= 0.0:
+            return None
+        return centered @ (positions - positions.mean(axis=0)) / denominator
+
+    def get_velocity(self, window=None, end=None):
+        """
+        Velocity over the most recent window, fitted by least squares
+
+        Args:
+            window: Seconds of history to fit (defaults to self.window)
+            end: Fit the window ending at this timestamp instead of the
+                newest sample
+
+        Returns:
+            (2,) array (vx, vy) in normalized units per second, or None
+            with fewer than two samples in the window
+        """
+        return self._fit_velocity(*self._window(window, end))
+
+    def get_acceleration(self, window=None):
+        """
+        Change between the velocity over the latest window and the one
+        before it
+
+        A hand that has no history before the latest window is taken to
+        have started from rest.
+
+        Returns:
+            (2,) array (ax, ay) in normalized units per second squared, or
+            None while the latest window has no velocity
+        """
+        window = self.window if window is None else window
+        current = self.get_velocity(window)
+        if current is None:
+            return None
+        newest = self._times[(self._index - 1) % self.buffer_size]
+        previous = self.get_velocity(window, end=newest - window)
+        if previous is None:
+            previous = np.zeros(2)
+        return (current - previous) / window
+
     def get_motion_vector(self):
         """
-        Calculate motion vector from recent positions
-        
+        Net displacement across the whole buffer
+
         Returns:
             tuple (dx, dy) representing movement direction
             or None if insufficient data
         """
-        if len(self.position_buffer) < 2:
+        if self._count < 2:
             return None
-        
-        # Get first and last position in buffer
-        start_pos = self.position_buffer[0]
-        end_pos = self.position_buffer[-1]
-        
-        # Calculate displacement
-        dx = end_pos[0] - start_pos[0]
-        dy = end_pos[1] - start_pos[1]
-        
-        return (dx, dy)
-    
-    def get_motion_direction(self, threshold=0.05):
-        """
-        Determine primary motion direction
-        
+
+        start_pos = self._positions[(self._index - self._count) % self.buffer_size]
+        end_pos = self._positions[(self._index - 1) % self.buffer_size]
+        return (end_pos[0] - start_pos[0], end_pos[1] - start_pos[1])
+
+    @staticmethod
+    def _direction(vector):
+        dx, dy = vector
+        if abs(dx) > abs(dy):
+            # Horizontal movement
+            return "right" if dx > 0 else "left"
+        # Vertical movement
+        # Note: In image coordinates, Y increases downward
+        return "down" if dy > 0 else "up"
+
+    def get_motion_direction(self, min_speed=0.5):
+        """
+        Determine primary motion direction from the current velocity
+
         Args:
-            threshold: Minimum displacement to register as motion
-        
+            min_speed: Minimum speed (normalized units per second) to
+                register as motion
+
         Returns:
             str: "left", "right", "up", "down", "stationary", or None
         """
-        vector = self.get_motion_vector()
-        
-        if vector is None:
+        velocity = self.get_velocity()
+
+        if velocity is None:
             return None
-        
-        dx, dy = vector
-        
-        # Calculate magnitude of movement
-        magnitude = np.sqrt(dx**2 + dy**2)
-        
-        if magnitude < threshold:
+
+        if np.hypot(velocity[0], velocity[1]) < min_speed:
             return "stationary"
-        
-        # Determine primary direction based on which component is larger
-        if abs(dx) > abs(dy):
-            # Horizontal movement
-            return "right" if dx > 0 else "left"
-        else:
-            # Vertical movement
-            # Note: In image coordinates, Y increases downward
-            return "down" if dy > 0 else "up"
-    
+
+        return self._direction(velocity)
+
+    def detect_swipe(self, min_speed, min_acceleration, min_samples=3, min_linearity=0.9):
+        """
+        Swipe onset: fast motion along one axis that the hand has just
+        accelerated into
+
+        Looking at velocity and acceleration instead of net displacement
+        fires a few frames after the hand starts moving. Every step inside
+        the window has to move the same way, so one glitched frame doesn't
+        count, and a hand still moving after a swipe (steady velocity) does
+        not fire again.
+
+        Args:
+            min_speed: Speed along the swipe axis (units per second)
+            min_acceleration: Acceleration along it (units per second^2)
+            min_samples: Samples the window must hold
+            min_linearity: Least R^2 of the straight-line fit along the axis
+
+        Returns:
+            tuple (direction, speed) or None
+        """
+        if self._count < min_samples:
+            return None
+
+        times, positions = self._window()
+        if len(times) < min_samples:
+            return None
+
+        velocity = self._fit_velocity(times, positions)
+        if velocity is None:
+            return None
+
+        axis = 0 if abs(velocity[0]) > abs(velocity[1]) else 1
+        speed = abs(velocity[axis])
+        if speed < min_speed:
+            return None
+
+        sign = np.sign(velocity[axis])
+        steps = np.diff(positions[:, axis])
+        if np.any(steps * sign <= 0.0):
+            return None
+
+        # A straight-line fit has to explain the motion; a one-frame jump
+        # fits a line badly
+        track = positions[:, axis] - positions[:, axis].mean()
+        fitted = (times - times.mean()) * velocity[axis]
+        residual = track - fitted
+        if np.dot(residual, residual) > (1.0 - min_linearity) * np.dot(track, track):
+            return None
+
+        acceleration = self.get_acceleration()
+        if acceleration is None or acceleration[axis] * sign < min_acceleration:
+            return None
+
+        return self._direction(velocity), float(speed)
+
     def clear_buffer(self):
         """
         Clear position buffer (call when gesture is recognized)
         """
-        self.position_buffer.clear()
-    
+        self._index = 0
+        self._count = 0
+
     def is_motion_stable(self, min_frames=3):
         """
         Check if we have enough frames for reliable motion detection
-        
+
         Returns:
             bool
         """
-        return len(self.position_buffer) >= min_frames
+        return self._count >= min_frames
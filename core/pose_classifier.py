@@ -0,0 +1,250 @@
+"""
+OKTrix Pose Classifier
+Nearest-centroid classification of static hand poses over scale-normalized
+landmark features, trained from recorded landmark streams or traces
+
+Training:
+    python -m core.pose_classifier --pose ok traces/ok.oktrace \\
+        --pose open traces/open.oktrace --pose play_pause traces/pp.jsonl \\
+        --out models/pose_classifier.npz
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+
+# Landmarks whose pairwise distances make up the feature vector: wrist,
+# thumb IP and tip, then MCP, PIP and tip of the four fingers
+FEATURE_LANDMARKS = np.array([0, 3, 4, 5, 6, 8, 9, 10, 12, 13, 14, 16, 17, 18, 20])
+_PAIRS = np.array([(i, j) for i in range(len(FEATURE_LANDMARKS))
+                   for j in range(i + 1, len(FEATURE_LANDMARKS))])
+FEATURE_SIZE = len(_PAIRS)
+
+# Wrist -> middle finger MCP, the palm length every distance is divided by
+PALM = (0, 9)
+
+# Poses the gesture engine asks about
+POSES = ('open', 'ok', 'play_pause')
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'models', 'pose_classifier.npz')
+
+
+def pose_features(landmarks):
+    """
+    Scale- and rotation-invariant features for one or many hands
+
+    Pairwise 3D distances between FEATURE_LANDMARKS, divided by the palm
+    length, so the same pose gives the same features near or far from the
+    camera and at any wrist angle.
+
+    Args:
+        landmarks: (21, 3) array, or (N, 21, 3) for a batch
+
+    Returns:
+        (FEATURE_SIZE,) or (N, FEATURE_SIZE) float32 array
+    """
+    points = np.asarray(landmarks, dtype=np.float32)
+    single = points.ndim == 2
+    if single:
+        points = points[None]
+
+    palm = np.linalg.norm(points[:, PALM[0]] - points[:, PALM[1]], axis=1)
+    selected = points[:, FEATURE_LANDMARKS]
+    deltas = selected[:, _PAIRS[:, 0]] - selected[:, _PAIRS[:, 1]]
+    features = np.sqrt(np.einsum('nij,nij->ni', deltas, deltas))
+    features /= np.maximum(palm, 1e-6)[:, None]
+
+    return features[0] if single else features
+
+
+class PoseClassifier:
+    def __init__(self, classes, centroids, scale, radius):
+        """
+        Nearest-centroid pose classifier
+
+        Features are standardized by a shared per-feature scale; every
+        hand in a frame is scored against every pose in one matrix
+        product, so adding a pose adds a row, not another predicate.
+
+        Args:
+            classes: Pose names, aligned with the centroid rows
+            centroids: (C, FEATURE_SIZE) standardized class means
+            scale: (FEATURE_SIZE,) per-feature standard deviation
+            radius: (C,) largest distance still accepted as that pose;
+                farther hands are classified as None (no known pose)
+        """
+        self.classes = tuple(classes)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.radius = np.asarray(radius, dtype=np.float32)
+        self._centroid_norms = (self.centroids ** 2).sum(axis=1)
+
+    @classmethod
+    def fit(cls, features, labels, radius_percentile=99.0, radius_margin=1.5):
+        """
+        Train from labelled feature vectors
+
+        Args:
+            features: (N, FEATURE_SIZE) array from pose_features()
+            labels: N pose names
+            radius_percentile: Training distance percentile per pose that
+                sets its acceptance radius
+            radius_margin: Factor applied on top of that percentile
+
+        Returns:
+            PoseClassifier
+        """
+        features = np.asarray(features, dtype=np.float32)
+        labels = np.asarray(labels)
+        classes = tuple(sorted(set(labels.tolist())))
+
+        # Pooled within-class spread, so no pose's variance dominates
+        residuals = np.concatenate([
+            features[labels == name] - features[labels == name].mean(axis=0)
+            for name in classes
+        ])
+        scale = np.maximum(residuals.std(axis=0), 1e-3)
+
+        standardized = features / scale
+        centroids = np.stack([standardized[labels == name].mean(axis=0) for name in classes])
+
+        radius = []
+        for c, name in enumerate(classes):
+            distances = np.linalg.norm(standardized[labels == name] - centroids[c], axis=1)
+            radius.append(np.percentile(distances, radius_percentile) * radius_margin)
+
+        return cls(classes, centroids, scale, radius)
+
+    def score(self, features):
+        """
+        Distance from every hand to every pose centroid
+
+        Args:
+            features: (N, FEATURE_SIZE) array
+
+        Returns:
+            (N, C) array of standardized distances
+        """
+        x = np.asarray(features, dtype=np.float32) / self.scale
+        squared = (x ** 2).sum(axis=1)[:, None] - 2.0 * (x @ self.centroids.T) + self._centroid_norms
+        return np.sqrt(np.maximum(squared, 0.0))
+
+    def predict(self, landmarks):
+        """
+        Classify a batch of hands
+
+        Args:
+            landmarks: (N, 21, 3) array or list of (21, 3) arrays
+
+        Returns:
+            list of pose names (None where no pose is close enough)
+        """
+        if len(landmarks) == 0:
+            return []
+        distances = self.score(pose_features(np.asarray(landmarks)))
+        nearest = distances.argmin(axis=1)
+        accepted = distances[np.arange(len(nearest)), nearest] <= self.radius[nearest]
+        return [self.classes[c] if ok else None for c, ok in zip(nearest, accepted)]
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, classes=np.array(self.classes), centroids=self.centroids,
+                 scale=self.scale, radius=self.radius, feature_size=FEATURE_SIZE)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns:
+            PoseClassifier
+
+        Raises:
+            ValueError: the model was built for a different feature layout
+        """
+        with np.load(path) as data:
+            if int(data['feature_size']) != FEATURE_SIZE:
+                raise ValueError(f"Pose model {path} has an incompatible feature layout")
+            return cls(data['classes'].tolist(), data['centroids'], data['scale'], data['radius'])
+
+
+def load_default_classifier(path=None):
+    """
+    Load the pose model named by OKTRIX_POSE_MODEL, or models/pose_classifier.npz
+
+    Returns:
+        PoseClassifier, or None when there is no model (the hand tracker
+        then uses its distance heuristics)
+    """
+    if path is None:
+        path = os.environ.get('OKTRIX_POSE_MODEL', DEFAULT_MODEL_PATH)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        classifier = PoseClassifier.load(path)
+    except Exception as e:
+        print(f"Warning: Could not load pose model {path}: {e}")
+        return None
+    print(f"Pose classifier: {', '.join(classifier.classes)} ({path})")
+    return classifier
+
+
+def collect_landmarks(spec):
+    """
+    Every hand in a recorded landmark stream or trace
+
+    Returns:
+        (N, 21, 3) float32 array
+    """
+    from .frame_source import open_frame_source
+
+    source = open_frame_source(spec, realtime=False)
+    hands = []
+    try:
+        while True:
+            ok, hand_data = source.read()
+            if not ok:
+                break
+            hands.extend(hand['landmarks'] for hand in hand_data.get('hands') or [])
+    finally:
+        source.release()
+    return np.asarray(hands, dtype=np.float32).reshape(-1, 21, 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the OKTrix pose classifier")
+    parser.add_argument('--pose', nargs='+', action='append', required=True,
+                        metavar=('NAME', 'RECORDING'),
+                        help="pose name followed by recordings of a hand holding it")
+    parser.add_argument('--out', default=DEFAULT_MODEL_PATH, help="model file (.npz)")
+    args = parser.parse_args(argv)
+
+    features = []
+    labels = []
+    for name, *recordings in args.pose:
+        for spec in recordings:
+            batch = pose_features(collect_landmarks(spec))
+            features.append(batch)
+            labels += [name] * len(batch)
+            print(f"  {name:<12}{len(batch):>6} hands  {spec}")
+
+    if not labels:
+        print("No hands found in the recordings", file=sys.stderr)
+        return 1
+
+    features = np.concatenate(features)
+    classifier = PoseClassifier.fit(features, labels)
+    predicted = np.array([classifier.classes[c] for c in classifier.score(features).argmin(axis=1)])
+    accuracy = float((predicted == np.asarray(labels)).mean())
+
+    classifier.save(args.out)
+    print(f"Saved {args.out}: {len(classifier.classes)} poses, training accuracy {accuracy:.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
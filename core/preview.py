@@ -0,0 +1,265 @@
+"""
+OKTrix Preview
+Renders and encodes the tracking preview sent to the Electron UI
+"""
+
+import base64
+import time
+
+import cv2
+import numpy as np
+
+
+PREVIEW_SIZE = (640, 480)
+
+
+HAND_CONNECTIONS = (
+    (0,1),(1,2),(2,3),(3,4), (0,5),(5,6),(6,7),(7,8),
+    (0,9),(9,10),(10,11),(11,12), (0,13),(13,14),(14,15),(15,16),
+    (0,17),(17,18),(18,19),(19,20), (5,9),(9,13),(13,17)
+)
+
+MINT = (192, 211, 125)  # Mint green BGR
+
+# (thickness, alpha) from outer glow to core
+LINE_GLOW = ((8, 30), (5, 60), (3, 120), (2, 255))
+# (radius multiplier, alpha) from outer glow to core
+POINT_GLOW = ((3, 20), (2, 40), (1, 255))
+
+
+def fade(color, alpha):
+    return tuple(int(x * alpha / 255) for x in color)
+
+
+class GlowRenderer:
+    def __init__(self, size=PREVIEW_SIZE, color=MINT):
+        """
+        Skeleton overlay with the brushes prepared once per output size
+
+        Line colors are precomputed, and each landmark's three concentric
+        glow circles are pre-rendered into a sprite that is blitted through
+        its mask. Strokes and sprites are drawn in the same order as
+        drawing every primitive one by one, so the output is pixel-identical;
+        batching whole layers would let a later glow cover an earlier core
+        differently where strokes overlap.
+
+        Args:
+            size: (width, height) of the preview
+            color: BGR skeleton color
+        """
+        self.width, self.height = size
+        self.line_layers = [(thick, fade(color, alpha)) for thick, alpha in LINE_GLOW]
+
+        # Wrist gets the larger point
+        radii = [8] + [5] * 20
+        sprites = {radius: self._make_sprite(radius, color) for radius in set(radii)}
+        self.point_sprites = [sprites[radius] for radius in radii]
+
+    def _make_sprite(self, radius, color):
+        """
+        Glow stamp for one landmark: (half size, image, mask)
+        """
+        half = radius * POINT_GLOW[0][0]
+        side = 2 * half + 1
+        image = np.zeros((side, side, 3), dtype=np.uint8)
+        mask = np.zeros((side, side), dtype=np.uint8)
+        for multiplier, alpha in POINT_GLOW:
+            cv2.circle(image, (half, half), radius * multiplier, fade(color, alpha), -1)
+        cv2.circle(mask, (half, half), half, 255, -1)
+        return half, image, mask
+
+    def render(self, result):
+        """
+        Args:
+            result: GestureEngine result
+
+        Returns:
+            BGR frame with every detected hand drawn
+        """
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+        if not result['hand_detected']:
+            return frame
+
+        try:
+            hands = result.get('hands')
+            if hands:
+                all_landmarks = [hand['landmarks'] for hand in hands]
+            else:
+                all_landmarks = [result.get('landmarks')]
+
+            for landmarks in all_landmarks:
+                if landmarks is None:
+                    continue
+                self.draw_hand(frame, landmarks)
+
+        except Exception as e:
+            print(f"Draw error: {e}")
+
+        return frame
+
+    def draw_hand(self, frame, landmarks):
+        # Pixel coordinates in float64, truncated like int(x * w) on the
+        # Python floats the per-primitive drawing used; float32 products
+        # round differently near pixel edges
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        scale = np.array((self.width, self.height), dtype=np.float64)
+        points = (landmarks[:, :2] * scale).astype(np.int32).tolist()
+
+        # Connections with glow
+        for start_idx, end_idx in HAND_CONNECTIONS:
+            sp = points[start_idx]
+            ep = points[end_idx]
+            for thick, color in self.line_layers:
+                cv2.line(frame, sp, ep, color, thick)
+
+        # Points with glow
+        for (x, y), (half, image, mask) in zip(points, self.point_sprites):
+            x0, y0 = max(x - half, 0), max(y - half, 0)
+            x1, y1 = min(x + half + 1, self.width), min(y + half + 1, self.height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            sx, sy = x0 - (x - half), y0 - (y - half)
+            sprite = (slice(sy, sy + y1 - y0), slice(sx, sx + x1 - x0))
+            cv2.copyTo(image[sprite], mask[sprite], frame[y0:y1, x0:x1])
+
+
+_renderer = None
+
+
+def create_tracking_frame(result):
+    """Create black frame with mint landmarks and glow"""
+    global _renderer
+    if _renderer is None:
+        _renderer = GlowRenderer()
+    return _renderer.render(result)
+
+
+def encode_frame(frame):
+    _, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return f"data:image/jpeg;base64,{base64.b64encode(buf).decode()}"
+
+
+def pack_landmarks(landmarks):
+    """Pack normalized (x, y) landmark coordinates as little-endian float32 bytes"""
+    if landmarks is None:
+        return None
+    return np.asarray(landmarks, dtype='<f4')[:, :2].tobytes()
+
+
+def pack_hands(hands):
+    """Pack every hand's (x, y) coordinates back to back, 42 floats per hand"""
+    if not hands:
+        return None
+    return b''.join(pack_landmarks(hand['landmarks']) for hand in hands)
+
+
+_empty_frame_url = None
+
+
+def encode_empty_frame():
+    """Encoded all-black preview, built once"""
+    global _empty_frame_url
+    if _empty_frame_url is None:
+        w, h = PREVIEW_SIZE
+        _empty_frame_url = encode_frame(np.zeros((h, w, 3), dtype=np.uint8))
+    return _empty_frame_url
+
+
+class PreviewThrottle:
+    UPDATE = 'update'
+    STATUS = 'status'
+
+    def __init__(self, max_fps=20.0):
+        """
+        Decide which results are worth a preview update
+
+        Analysis still runs on every camera frame; this only limits what
+        gets rendered, encoded and emitted.
+
+        - Gestures always go out immediately.
+        - No hand: one small status update when the state changes, then
+          nothing until it changes again.
+        - Hand visible: at most max_fps previews, and none when the
+          landmarks (at preview pixel resolution) and state are unchanged.
+
+        Args:
+            max_fps: Preview frame rate cap
+        """
+        self.max_fps = max_fps
+        self.invalidate()
+
+        # Counters
+        self.updates = 0
+        self.statuses = 0
+        self.skipped = 0
+
+    def invalidate(self):
+        """
+        Force the next result out, e.g. when a client connects
+        """
+        self._last_kind = None
+        self._last_state = None
+        self._last_points = None
+        self._last_update_time = None
+
+    def decide(self, result, activation_progress, now=None):
+        """
+        Args:
+            result: GestureEngine result
+            activation_progress: float from get_activation_progress()
+            now: monotonic timestamp, defaults to time.monotonic()
+
+        Returns:
+            UPDATE (full preview), STATUS (no-hand status only) or None (skip)
+        """
+        if now is None:
+            now = time.monotonic()
+
+        state = (
+            result['hand_detected'],
+            result['system_active'],
+            result['current_gesture'],
+            result.get('play_pause_display'),
+            round(activation_progress, 2)
+        )
+
+        if result['current_gesture']:
+            return self._record(self.UPDATE, state, None, now)
+
+        if not result['hand_detected']:
+            if self._last_kind == self.STATUS and state == self._last_state:
+                return self._skip()
+            return self._record(self.STATUS, state, None, now)
+
+        if (self._last_update_time is not None and
+                now - self._last_update_time < 1.0 / self.max_fps):
+            return self._skip()
+
+        points = self._quantize(result)
+        if (self._last_kind == self.UPDATE and state == self._last_state and
+                self._last_points is not None and np.array_equal(points, self._last_points)):
+            return self._skip()
+
+        return self._record(self.UPDATE, state, points, now)
+
+    def _quantize(self, result):
+        w, h = PREVIEW_SIZE
+        hands = result.get('hands') or [{'landmarks': result['landmarks']}]
+        points = np.concatenate([hand['landmarks'][:, :2] for hand in hands])
+        return (points * (w, h)).astype(np.int32)
+
+    def _record(self, kind, state, points, now):
+        self._last_kind = kind
+        self._last_state = state
+        self._last_points = points
+        if kind == self.UPDATE:
+            self._last_update_time = now
+            self.updates += 1
+        else:
+            self.statuses += 1
+        return kind
+
+    def _skip(self):
+        self.skipped += 1
+        return None
@@ -0,0 +1,323 @@
+"""
+OKTrix Landmark Traces
+Compact binary recording of the engine's input and gestures, replayed
+through a memory map without MediaPipe or a camera
+"""
+
+import json
+import struct
+import threading
+
+import numpy as np
+
+from .frame_source import FrameSource
+
+
+TRACE_MAGIC = b'OKTRACE\0'
+TRACE_VERSION = 1
+
+# magic, version, max_hands, floats per record, start time, metadata bytes
+HEADER = struct.Struct('<8sHHIdI')
+# index offset, index entries, magic
+TRAILER = struct.Struct('<QI4s')
+INDEX_MAGIC = b'OKIX'
+
+# Record layout, all float32: frame fields, then one block per hand slot.
+# The time (seconds since the first frame) is a float64 spread over the
+# first two slots, so replayed holds and cooldowns end on the same frame.
+T, ACTIVE, HAND_COUNT, GESTURES = 0, 2, 3, 4
+FRAME_FIELDS = 5
+HANDEDNESS, SCORE, LANDMARKS = range(3)
+HAND_FIELDS = 2 + 21 * 3
+
+HANDEDNESS_CODES = {'Left': 0.0, 'Right': 1.0}
+HANDEDNESS_NAMES = {0: 'Left', 1: 'Right'}
+
+# Bit positions in the GESTURES field for traces without their own table
+# in the metadata ('gestures'), i.e. recorded before gestures were
+# configurable
+GESTURE_CODES = ('system_toggle', 'swipe_left', 'swipe_right', 'swipe_up', 'swipe_down',
+                 'play_pause')
+# Bits a float32 field holds exactly
+MAX_GESTURE_CODES = 24
+
+
+def record_floats(max_hands):
+    # Padded to an even count so every record's time stays 8-byte aligned
+    floats = FRAME_FIELDS + max_hands * HAND_FIELDS
+    return floats + floats % 2
+
+
+def gesture_mask(gestures, codes=GESTURE_CODES):
+    """
+    Args:
+        gestures: iterable of gesture names
+        codes: Gesture name per bit
+
+    Returns:
+        int with one bit per codes entry
+
+    Raises:
+        ValueError: a gesture has no bit; it would be missing from the
+            trace and every replay would report it as a mismatch
+    """
+    mask = 0
+    for gesture in gestures:
+        try:
+            mask |= 1 << codes.index(gesture)
+        except ValueError:
+            raise ValueError(f"Gesture '{gesture}' is not in the trace's gesture table") from None
+    return mask
+
+
+def gesture_names(mask, codes=GESTURE_CODES):
+    return [name for bit, name in enumerate(codes) if int(mask) & (1 << bit)]
+
+
+class TraceRecorder:
+    def __init__(self, path, max_hands=1, metadata=None, gestures=GESTURE_CODES):
+        """
+        Append-only trace file, one fixed-size float32 record per frame
+
+        File layout: header, JSON metadata, records, then on close an
+        index of the frames where gestures fired and a trailer pointing
+        at it. A file cut short by a crash keeps every complete record;
+        the reader rebuilds the index from the records.
+
+        Args:
+            path: Output file (conventionally *.oktrace)
+            max_hands: Hand slots per record; extra hands are not recorded
+            metadata: JSON-serializable engine settings needed to replay
+                the trace the same way (landmark filter, ...)
+            gestures: Every gesture name that can be recorded, one bit
+                each; stored in the metadata
+        """
+        if len(gestures) > MAX_GESTURE_CODES:
+            raise ValueError(f"A trace can record at most {MAX_GESTURE_CODES} gesture names")
+        self.path = path
+        self.max_hands = max_hands
+        self.gesture_codes = tuple(gestures)
+        self.metadata = dict(metadata or {}, gestures=list(self.gesture_codes))
+        self.floats = record_floats(max_hands)
+
+        self._file = open(path, 'wb')
+        self._lock = threading.Lock()
+        self._record = np.zeros(self.floats, dtype='<f4')
+        self._start_time = None
+        self._header_written = False
+        self._events = []
+
+        self.frames = 0
+
+    def _write_header(self, start_time):
+        meta = json.dumps(self.metadata).encode('utf-8')
+        # Records start 16-byte aligned
+        padding = -(HEADER.size + len(meta)) % 16
+        self._file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.max_hands,
+                                     self.floats, start_time, len(meta) + padding))
+        self._file.write(meta + b' ' * padding)
+        self._start_time = start_time
+        self._header_written = True
+
+    def write(self, timestamp, hands, gestures=(), active=False):
+        """
+        Append one frame
+
+        Args:
+            timestamp: Frame time in seconds
+            hands: list of dicts with 'landmarks', 'handedness' and
+                optionally 'score', as given to the engine
+            gestures: Gesture names the engine emitted for this frame
+            active: System state before the frame was processed
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            if not self._header_written:
+                self._write_header(timestamp)
+
+            record = self._record
+            record.fill(0.0)
+            hands = hands[:self.max_hands]
+            mask = gesture_mask(gestures, self.gesture_codes)
+            record[T:T + 2].view('<f8')[0] = timestamp - self._start_time
+            record[ACTIVE] = float(active)
+            record[HAND_COUNT] = len(hands)
+            record[GESTURES] = mask
+            for slot, hand in enumerate(hands):
+                base = FRAME_FIELDS + slot * HAND_FIELDS
+                record[base + HANDEDNESS] = HANDEDNESS_CODES.get(hand.get('handedness'), -1.0)
+                record[base + SCORE] = hand.get('score', 1.0)
+                record[base + LANDMARKS:base + HAND_FIELDS] = np.ravel(hand['landmarks'])
+
+            self._file.write(record.tobytes())
+            if mask:
+                self._events.append((self.frames, mask))
+            self.frames += 1
+
+    def close(self):
+        """
+        Write the gesture index and trailer and close the file
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            if not self._header_written:
+                self._write_header(0.0)
+            index_offset = self._file.tell()
+            self._file.write(np.asarray(self._events, dtype='<u4').reshape(-1, 2).tobytes())
+            self._file.write(TRAILER.pack(index_offset, len(self._events), INDEX_MAGIC))
+            self._file.close()
+            self._file = None
+
+
+class TraceReader:
+    def __init__(self, path):
+        """
+        Memory-mapped view of a trace file
+
+        Records are read straight from the page cache as one
+        (frames, floats) float32 array; nothing is parsed up front.
+
+        Args:
+            path: Trace written by TraceRecorder
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"Not a trace file: {path}")
+            magic, version, self.max_hands, self.floats, self.start_time, meta_size = \
+                HEADER.unpack(header)
+            if magic != TRACE_MAGIC:
+                raise ValueError(f"Not a trace file: {path}")
+            if version > TRACE_VERSION:
+                raise ValueError(f"Trace version {version} is newer than supported ({TRACE_VERSION})")
+            self.metadata = json.loads(f.read(meta_size).decode('utf-8') or '{}')
+            self.gesture_codes = tuple(self.metadata.get('gestures', GESTURE_CODES))
+
+            f.seek(0, 2)
+            size = f.tell()
+            records_offset = HEADER.size + meta_size
+            record_bytes = self.floats * 4
+
+            index = None
+            if size - records_offset >= TRAILER.size:
+                f.seek(size - TRAILER.size)
+                index_offset, index_count, index_magic = TRAILER.unpack(f.read(TRAILER.size))
+                if index_magic == INDEX_MAGIC:
+                    f.seek(index_offset)
+                    index = np.frombuffer(f.read(index_count * 8), dtype='<u4').reshape(-1, 2)
+                    size = index_offset
+
+        count = (size - records_offset) // record_bytes
+        if count > 0:
+            self.records = np.memmap(path, dtype='<f4', mode='r', offset=records_offset,
+                                     shape=(count, self.floats))
+        else:
+            self.records = np.zeros((0, self.floats), dtype='<f4')
+
+        if index is None:
+            # No trailer (recording was cut short): rebuild from the records
+            masks = self.records[:, GESTURES].astype(np.uint32)
+            frames = np.flatnonzero(masks)
+            index = np.stack([frames.astype(np.uint32), masks[frames]], axis=1)
+        self.index = index
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        """Frame times in seconds, as recorded"""
+        return self.start_time + self._relative_times()
+
+    def _relative_times(self):
+        return np.ascontiguousarray(self.records[:, T:T + 2]).view('<f8')[:, 0]
+
+    def _relative_time(self, i):
+        return float(self.records[i, T:T + 2].view('<f8')[0])
+
+    def hand_data(self, i):
+        """
+        Frame i shaped like HandTracker.process_frame() output, with
+        'timestamp' for GestureEngine.process_hand_data()
+        """
+        record = self.records[i]
+        hands = []
+        for slot in range(int(record[HAND_COUNT])):
+            base = FRAME_FIELDS + slot * HAND_FIELDS
+            hands.append({
+                'landmarks': np.array(record[base + LANDMARKS:base + HAND_FIELDS]).reshape(21, 3),
+                'handedness': HANDEDNESS_NAMES.get(int(record[base + HANDEDNESS])),
+                'score': float(record[base + SCORE])
+            })
+        first = hands[0] if hands else {}
+        return {
+            'detected': bool(hands),
+            'landmarks': first.get('landmarks'),
+            'handedness': first.get('handedness'),
+            'hands': hands,
+            'annotated_frame': None,
+            'timestamp': self.start_time + self._relative_time(i)
+        }
+
+    def was_active(self, i=0):
+        """System state before frame i was processed"""
+        return bool(self.records[i, ACTIVE]) if len(self) else False
+
+    def gestures(self, i):
+        return gesture_names(self.records[i, GESTURES], self.gesture_codes)
+
+    def gesture_events(self):
+        """
+        Returns:
+            list of (frame, timestamp, gesture names) from the index
+        """
+        return [(int(frame), self.start_time + self._relative_time(frame), gesture_names(mask, self.gesture_codes))
+                for frame, mask in self.index]
+
+    def close(self):
+        self.records = None
+
+
+class TraceSource(FrameSource):
+    provides_landmarks = True
+
+    def __init__(self, path, realtime=True, loop=False):
+        """
+        Replay a binary trace like a recorded landmark stream
+
+        Args:
+            path: Trace written by TraceRecorder
+            realtime: Replay with the recorded timing instead of flat out
+            loop: Restart at end of file
+        """
+        super().__init__(realtime=realtime)
+        self.reader = TraceReader(path)
+        self.loop = loop
+        self.position = 0
+        self._time_offset = 0.0
+        self._last_timestamp = None
+        self._relative = self.reader._relative_times()
+
+    def read(self):
+        if self.position >= len(self.reader):
+            if not self.loop or not len(self.reader):
+                return False, None
+            self.position = 0
+            self._restart_clock()
+            self._time_offset = self._last_timestamp + 1.0 / self.fps - self.reader.timestamps[0]
+
+        hand_data = self.reader.hand_data(self.position)
+        self._pace(float(self._relative[self.position]))
+        self.position += 1
+        hand_data['timestamp'] += self._time_offset
+        self._last_timestamp = hand_data['timestamp']
+        return True, hand_data
+
+    def isOpened(self):
+        return len(self.reader) > 0
+
+    def release(self):
+        self.reader.close()
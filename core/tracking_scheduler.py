@@ -0,0 +1,255 @@
+"""
+OKTrix Tracking Scheduler
+Adaptive frame rate and region-of-interest inference around HandTracker
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class TrackingScheduler:
+    IDLE = 'idle'
+    ACTIVE = 'active'
+
+    def __init__(self, hand_tracker, idle_fps=5.0, idle_scale=0.5, idle_after=1.5,
+                 roi_margin=0.6, min_roi_size=0.35, max_roi_fraction=0.6,
+                 full_frame_interval=10):
+        """
+        Decide how much inference each frame gets
+
+        Idle (no hand for idle_after seconds): detection runs idle_fps times
+        per second on a downscaled frame and frames in between are skipped.
+        Active (hand seen): every frame is processed, cropped to a region
+        of interest around the last landmarks. A miss inside the ROI falls
+        back to the full frame before the hand is declared lost. With
+        multi-hand tracking the ROI covers every tracked hand, and while
+        fewer than max_hands are tracked a full frame runs every
+        full_frame_interval frames so new hands can enter.
+
+        Args:
+            hand_tracker: HandTracker used for inference
+            idle_fps: Detection rate while idle
+            idle_scale: Downscale factor for idle detection
+            idle_after: Seconds without a hand before going idle
+            roi_margin: ROI padding around the hand, as a fraction of its size
+            min_roi_size: Smallest ROI side, as a fraction of the frame's short side
+            max_roi_fraction: Use the full frame when the ROI would cover
+                more than this fraction of its area
+            full_frame_interval: Frames between full-frame looks for new
+                hands while fewer than max_hands are tracked
+        """
+        self.hand_tracker = hand_tracker
+        self.idle_fps = idle_fps
+        self.idle_scale = idle_scale
+        self.idle_after = idle_after
+        self.roi_margin = roi_margin
+        self.min_roi_size = min_roi_size
+        self.max_roi_fraction = max_roi_fraction
+        self.full_frame_interval = full_frame_interval
+
+        self.mode = self.IDLE
+        self.roi = None
+        self.tracked_hands = 0
+        self.frames_since_full = 0
+        self.last_seen = None
+        self.last_idle_run = None
+
+        # Counters
+        self.frames_skipped = 0
+        self.frames_idle = 0
+        self.frames_roi = 0
+        self.frames_full = 0
+
+    def process_frame(self, frame, timings=None, now=None, annotate=True):
+        """
+        Track hands with the current schedule
+
+        Args:
+            frame: BGR image from webcam
+            timings: optional dict, passed through to HandTracker
+            now: monotonic timestamp, defaults to time.monotonic()
+            annotate: Return a full-size annotated frame; False skips the
+                drawing and every frame copy (annotated_frame is None)
+
+        Returns:
+            dict shaped like HandTracker.process_frame(), plus:
+                - skipped: True if no inference ran for this frame
+                - roi: (x0, y0, x1, y1) pixel box used, or None
+        """
+        if now is None:
+            now = time.monotonic()
+
+        if self.mode == self.IDLE:
+            return self._process_idle(frame, timings, now, annotate)
+        return self._process_active(frame, timings, now, annotate)
+
+    def _process_idle(self, frame, timings, now, annotate):
+        if self.last_idle_run is not None and now - self.last_idle_run < 1.0 / self.idle_fps:
+            self.frames_skipped += 1
+            return self._empty_result(frame if annotate else None, skipped=True)
+
+        self.last_idle_run = now
+        self.frames_idle += 1
+
+        small = cv2.resize(frame, None, fx=self.idle_scale, fy=self.idle_scale,
+                           interpolation=cv2.INTER_AREA)
+        hand_data = self.hand_tracker.process_frame(small, timings, annotate=False)
+        # Normalized landmarks are resolution independent; keep the
+        # full-size frame for anything downstream that wants pixels
+        hand_data['annotated_frame'] = frame if annotate else None
+        hand_data['skipped'] = False
+        hand_data['roi'] = None
+
+        if hand_data['detected']:
+            self.mode = self.ACTIVE
+            self.last_seen = now
+            self.tracked_hands = len(hand_data['hands'])
+            self.frames_since_full = 0
+            self.roi = self._compute_roi(self._all_points(hand_data), frame.shape)
+
+        return hand_data
+
+    def _process_active(self, frame, timings, now, annotate):
+        hand_data = None
+
+        # Look at the whole frame now and then for hands outside the ROI
+        max_hands = getattr(self.hand_tracker, 'max_hands', 1)
+        look_for_new = (self.tracked_hands < max_hands and
+                        self.frames_since_full >= self.full_frame_interval)
+
+        if self.roi is not None and not look_for_new:
+            self.frames_roi += 1
+            self.frames_since_full += 1
+            hand_data = self._process_roi(frame, self.roi, timings, annotate)
+            if not hand_data['detected']:
+                hand_data = None
+
+        if hand_data is None:
+            self.frames_full += 1
+            self.frames_since_full = 0
+            hand_data = self.hand_tracker.process_frame(frame, timings, annotate=annotate)
+            hand_data['roi'] = None
+            # Build a fresh crop from what the full frame found
+            self.roi = None
+
+        hand_data['skipped'] = False
+
+        if hand_data['detected']:
+            self.last_seen = now
+            self.tracked_hands = len(hand_data['hands'])
+            self._update_roi(self._all_points(hand_data), frame.shape)
+        elif now - self.last_seen > self.idle_after:
+            self.mode = self.IDLE
+            self.roi = None
+
+        return hand_data
+
+    def _process_roi(self, frame, roi, timings, annotate):
+        x0, y0, x1, y1 = roi
+        h, w = frame.shape[:2]
+        crop_w, crop_h = x1 - x0, y1 - y0
+
+        hand_data = self.hand_tracker.process_frame(frame[y0:y1, x0:x1], timings,
+                                                    annotate=annotate)
+        hand_data['roi'] = roi
+
+        if hand_data['detected']:
+            # Map crop-normalized coordinates back to the full frame
+            # (hand_data['landmarks'] is the first hand's array)
+            for hand in hand_data['hands']:
+                landmarks = hand['landmarks']
+                landmarks[:, 0] = (landmarks[:, 0] * crop_w + x0) / w
+                landmarks[:, 1] = (landmarks[:, 1] * crop_h + y0) / h
+                landmarks[:, 2] *= crop_w / w
+
+            if annotate:
+                annotated = frame.copy()
+                annotated[y0:y1, x0:x1] = hand_data['annotated_frame']
+                hand_data['annotated_frame'] = annotated
+
+        return hand_data
+
+    def _all_points(self, hand_data):
+        if len(hand_data['hands']) == 1:
+            return hand_data['landmarks']
+        return np.concatenate([hand['landmarks'] for hand in hand_data['hands']])
+
+    def _update_roi(self, landmarks, shape):
+        """
+        Re-center the ROI only when the hand nears its edge
+
+        A steady crop keeps MediaPipe's own frame-to-frame tracking valid;
+        moving it every frame looks like camera motion to the tracker.
+        """
+        if self.roi is not None:
+            h, w = shape[:2]
+            x0, y0, x1, y1 = self.roi
+            inset_x = (x1 - x0) * 0.15
+            inset_y = (y1 - y0) * 0.15
+            xs = landmarks[:, 0] * w
+            ys = landmarks[:, 1] * h
+            if (xs.min() > x0 + inset_x and xs.max() < x1 - inset_x and
+                    ys.min() > y0 + inset_y and ys.max() < y1 - inset_y):
+                return
+
+        self.roi = self._compute_roi(landmarks, shape)
+
+    def _compute_roi(self, landmarks, shape):
+        """
+        Square pixel box around the landmarks, or None for full frame
+        """
+        h, w = shape[:2]
+        xs = np.clip(landmarks[:, 0], 0.0, 1.0) * w
+        ys = np.clip(landmarks[:, 1], 0.0, 1.0) * h
+
+        hand_size = max(xs.max() - xs.min(), ys.max() - ys.min())
+        side = max(hand_size * (1.0 + 2.0 * self.roi_margin), self.min_roi_size * min(w, h))
+        side = int(min(side, w, h))
+
+        if side * side > self.max_roi_fraction * w * h:
+            return None
+
+        cx = (xs.min() + xs.max()) / 2.0
+        cy = (ys.min() + ys.max()) / 2.0
+        x0 = int(np.clip(cx - side / 2.0, 0, w - side))
+        y0 = int(np.clip(cy - side / 2.0, 0, h - side))
+        return (x0, y0, x0 + side, y0 + side)
+
+    def _empty_result(self, frame, skipped=False):
+        return {
+            'detected': False,
+            'landmarks': None,
+            'handedness': None,
+            'hands': [],
+            'annotated_frame': frame,
+            'skipped': skipped,
+            'roi': None
+        }
+
+    def reset(self):
+        """
+        Drop back to idle detection
+        """
+        self.mode = self.IDLE
+        self.roi = None
+        self.tracked_hands = 0
+        self.frames_since_full = 0
+        self.last_seen = None
+        self.last_idle_run = None
+
+    def get_stats(self):
+        """
+        Scheduling counters
+
+        Returns:
+            dict with current mode and frames per scheduling path
+        """
+        return {
+            'mode': self.mode,
+            'frames_skipped': self.frames_skipped,
+            'frames_idle': self.frames_idle,
+            'frames_roi': self.frames_roi,
+            'frames_full': self.frames_full
+        }
@@ -0,0 +1,135 @@
+"""
+OKTrix Media Backends
+Platform interface behind MediaController, plus an in-process fake
+"""
+
+import os
+import sys
+
+from .volume_control import MemoryVolume
+
+
+class MediaBackend:
+    """
+    Sends player commands on one platform
+
+    Players are identified by short names ('spotify', 'vlc', ...). The
+    platform modules are only imported when their backend is created, so
+    this module and MediaController import anywhere.
+    """
+
+    name = 'none'
+
+    def __init__(self):
+        # VolumeBackend used for swipe up/down
+        self.volume = MemoryVolume()
+
+    def detect_player(self):
+        """
+        Returns:
+            str: player to send commands to, or None
+        """
+        raise NotImplementedError
+
+    def play_pause(self, player):
+        raise NotImplementedError
+
+    def next_track(self, player, count=1):
+        raise NotImplementedError
+
+    def previous_track(self, player, count=1):
+        raise NotImplementedError
+
+    def get_playback_state(self, player):
+        """
+        Returns:
+            'PLAYING', 'PAUSED', or None when the platform can't tell
+        """
+        return None
+
+    def apply_config(self, config):
+        """
+        Take per-player bindings from a GestureConfig; backends that talk
+        to players directly (MPRIS, fake) have nothing to bind
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeMediaBackend(MediaBackend):
+    name = 'fake'
+
+    def __init__(self, player='fake'):
+        """
+        Records commands in memory; for Linux development, replays and
+        benchmarks
+
+        Args:
+            player: Player name reported as active (None for no player)
+        """
+        super().__init__()
+        self.player = player
+        self.playing = False
+        # (command, player, count)
+        self.commands = []
+
+    def detect_player(self):
+        return self.player
+
+    def play_pause(self, player):
+        self.commands.append(('play_pause', player, 1))
+        self.playing = not self.playing
+        return True
+
+    def next_track(self, player, count=1):
+        self.commands.append(('next', player, count))
+        return True
+
+    def previous_track(self, player, count=1):
+        self.commands.append(('previous', player, count))
+        return True
+
+    def get_playback_state(self, player):
+        return 'PLAYING' if self.playing else 'PAUSED'
+
+
+def create_media_backend(name=None):
+    """
+    Create the backend for this machine
+
+    Args:
+        name: 'windows', 'mpris' or 'fake'; defaults to the
+            OKTRIX_MEDIA_BACKEND environment variable, then to the
+            platform's native backend
+
+    Returns:
+        MediaBackend
+    """
+    if name is None:
+        name = os.environ.get('OKTRIX_MEDIA_BACKEND')
+    if name is None:
+        if sys.platform == 'win32':
+            name = 'windows'
+        elif sys.platform.startswith('linux'):
+            name = 'mpris'
+        else:
+            name = 'fake'
+
+    if name == 'windows':
+        from .windows_media import WindowsMediaBackend
+        return WindowsMediaBackend()
+
+    if name == 'mpris':
+        try:
+            from .mpris_media import MprisMediaBackend
+            return MprisMediaBackend()
+        except Exception as e:
+            print(f"Warning: MPRIS backend unavailable ({e}), media commands are simulated")
+            return FakeMediaBackend()
+
+    if name == 'fake':
+        return FakeMediaBackend()
+
+    raise ValueError(f"Unknown media backend: {name}")
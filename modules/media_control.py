@@ -3,248 +3,180 @@ OKTrix Media Control Module
 Translates gestures into media player commands (YouTube, Spotify, VLC, etc.)
 """
 
-import pyautogui
-import psutil
-import time
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-
-# Windows API
-try:
-    import win32gui
-    import win32con
-    WINDOWS_API_AVAILABLE = True
-except ImportError:
-    WINDOWS_API_AVAILABLE = False
-    print("Warning: pywin32 not available")
+from .media_backend import create_media_backend
 
 
 class MediaController:
-    def __init__(self):
-        """Initialize media controller"""
-        pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.1
-        
-        self.volume_interface = self._init_volume_control()
+    def __init__(self, backend=None, config=None):
+        """Initialize media controller
+        
+        Args:
+            backend: MediaBackend; defaults to the platform's backend
+                (see create_media_backend)
+            config: GestureConfig mapping gestures to actions; defaults
+                to the built-in gesture names (swipe_left -> previous
+                track, ...)
+        """
+        self.backend = backend if backend is not None else create_media_backend()
+        self.volume = self.backend.volume
         
         self.active_player = None
-        self.last_detection_time = 0
-        self.detection_cooldown = 2.0
-        
-        # Track real play/pause state per player
-        self.player_states = {
-            'spotify': 'PAUSED',
-            'vlc': 'PAUSED',
-            'youtube': 'PAUSED',
-            'windows_media': 'PAUSED'
-        }
         
-    def _init_volume_control(self):
-        """Initialize Windows volume control interface"""
-        try:
-            import pythoncom
-            pythoncom.CoInitialize()
-        
-            devices = AudioUtilities.GetSpeakers()
-            interface = devices.Activate(
-                IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            volume = cast(interface, POINTER(IAudioEndpointVolume))
-            return volume
-        except Exception as e:
-            print(f"Warning: Could not initialize volume control: {e}")
-            return None
+        # Level change per normalized unit per second of swipe speed, and
+        # per swipe when no magnitude is known
+        self.volume_gain = 0.015
+        self.volume_step = 0.02
+        
+        # Track play/pause state per player where the backend can't read it
+        self.player_states = {}
+        
+        # Action -> bound handler(player, count, magnitude), built once
+        self.action_handlers = {
+            'play_pause': self._play_pause,
+            'previous_track': self._previous,
+            'next_track': self._next,
+            'volume_up': self._volume_up,
+            'volume_down': self._volume_down
+        }
+        # Gesture -> handler; replaced as a whole by apply_config()
+        self.dispatch = {
+            'play_pause': self._play_pause,
+            'swipe_left': self._previous,
+            'swipe_right': self._next,
+            'swipe_up': self._volume_up,
+            'swipe_down': self._volume_down
+        }
+        if config is not None:
+            self.apply_config(config)
     
-    def _activate_window(self, window_title_contains):
-        """Activate window containing title"""
-        if not WINDOWS_API_AVAILABLE:
-            return False
+    def apply_config(self, config):
+        """Use a new gesture config's actions, volume steps and player keys
+        
+        Args:
+            config: GestureConfig
+        """
+        # Gestures mapped to 'none' are recognized but do nothing
+        dispatch = {gesture: self.action_handlers[action]
+                    for gesture, action in config.actions.items()
+                    if action in self.action_handlers}
+        self.volume_gain = config.volume_gain
+        self.volume_step = config.volume_step
+        self.backend.apply_config(config)
+        self.dispatch = dispatch
         
-        def callback(hwnd, windows):
-            if win32gui.IsWindowVisible(hwnd):
-                title = win32gui.GetWindowText(hwnd)
-                if window_title_contains.lower() in title.lower():
-                    windows.append(hwnd)
-            return True
-        
-        windows = []
-        win32gui.EnumWindows(callback, windows)
-        
-        if windows:
-            hwnd = windows[0]
-            try:
-                if win32gui.IsIconic(hwnd):
-                    win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-                
-                win32gui.SetForegroundWindow(hwnd)
-                time.sleep(0.15)
-                return True
-            except Exception as e:
-                print(f"Error activating window: {e}")
-                return False
-        
-        return False
-    
     def detect_active_media_player(self):
         """Detect which media player is currently active"""
-        current_time = time.time()
-        
-        if current_time - self.last_detection_time < self.detection_cooldown:
-            return self.active_player
-        
-        self.last_detection_time = current_time
-        
-        process_names = [proc.name().lower() for proc in psutil.process_iter(['name'])]
-        
-        
-        
-        if 'spotify.exe' in process_names:
-            self.active_player = 'spotify'
-            return 'spotify'
-        
-        if 'vlc.exe' in process_names:
-            self.active_player = 'vlc'
-            return 'vlc'
-        
-        if 'wmplayer.exe' in process_names:
-            self.active_player = 'windows_media'
-            return 'windows_media'
-        
-        browsers = ['chrome.exe', 'firefox.exe', 'msedge.exe', 'opera.exe', 'brave.exe']
-        if any(browser in process_names for browser in browsers):
-            self.active_player = 'youtube'
-            return 'youtube'
-        
-        self.active_player = None
-        return None
+        self.active_player = self.backend.detect_player()
+        return self.active_player
     
-    def execute_gesture(self, gesture_name):
-        """Execute media command based on gesture"""
+    def execute_gesture(self, gesture_name, count=1, magnitude=None):
+        """Execute media command based on gesture
+        
+        Args:
+            gesture_name: Recognized gesture
+            count: Repetitions merged into one command (swipes only)
+            magnitude: Swipe speed at onset in normalized units per
+                second (summed over merged swipes), scales volume
+                changes; None uses a fixed step per swipe
+        """
+        handler = self.dispatch.get(gesture_name)
+        if handler is None:
+            print(f"No action for gesture: {gesture_name}")
+            return False
+        
         player = self.detect_active_media_player()
         
         if player is None:
             print(f"No media player detected for gesture: {gesture_name}")
             return False
         
-        if gesture_name == 'play_pause':
-            return self._play_pause(player)
-        elif gesture_name == 'swipe_left':
-            return self._previous(player)
-        elif gesture_name == 'swipe_right':
-            return self._next(player)
-        elif gesture_name == 'swipe_up':
-            return self._volume_up()
-        elif gesture_name == 'swipe_down':
-            return self._volume_down()
-        else:
-            print(f"Unknown gesture: {gesture_name}")
-            return False
+        # Refresh the cached state get_next_play_pause_display() shows
+        self._playback_state(player)
+        return handler(player, count, magnitude)
     
     def get_next_play_pause_display(self):
-        """Get current play/pause state to display"""
+        """Get current play/pause state to display
+        
+        Called from the frame thread, so it never queries the backend (a
+        D-Bus round trip can take up to its timeout); it shows the state
+        last read or set on the command thread.
+        """
         player = self.active_player
-        if player and player in self.player_states:
-            current_state = self.player_states[player]
+        if player:
+            current_state = self.player_states.get(player, 'PAUSED')
             
             return "PAUSE" if current_state == "PLAYING" else "PLAY"
         return "PLAY"
+    
+    def _playback_state(self, player):
+        state = self.backend.get_playback_state(player)
+        if state is None:
+            state = self.player_states.get(player, 'PAUSED')
+        self.player_states[player] = state
+        return state
 
-    def _play_pause(self, player):
+    def _play_pause(self, player, count=1, magnitude=None):
         """Play/Pause based on active player"""
+        # Read by execute_gesture() just before
+        current_state = self.player_states.get(player, 'PAUSED')
+        action = "PAUSE" if current_state == "PLAYING" else "PLAY"
         
-        if player == 'spotify':
-            self._activate_window('spotify')
-        elif player == 'vlc':
-            self._activate_window('vlc')
-        elif player == 'windows_media':
-            self._activate_window('windows media player')
-        
-        commands = {
-            'youtube': lambda: pyautogui.press('k'),
-            'spotify': lambda: pyautogui.press('space'),
-            'vlc': lambda: pyautogui.press('space'),
-            'windows_media': lambda: pyautogui.hotkey('ctrl', 'p')
-        }
+        if not self.backend.play_pause(player):
+            return False
         
-        if player in commands:
-            
-            current_state = self.player_states.get(player, 'PAUSED')
-            action = "PAUSE" if current_state == "PLAYING" else "PLAY"
-            
-            # Execute command
-            commands[player]()
-            
-            # Update state
-            self.player_states[player] = "PAUSED" if current_state == "PLAYING" else "PLAYING"
-            
-            print(f"{action} -> {player.upper()}")
-            return True
-        return False
+        # Update state
+        self.player_states[player] = "PAUSED" if current_state == "PLAYING" else "PLAYING"
+        
+        print(f"{action} -> {player.upper()}")
+        return True
     
-    def _previous(self, player):
+    def _previous(self, player, count=1, magnitude=None):
         """Previous track/video"""
-        if player == 'spotify':
-            self._activate_window('spotify')
-        elif player == 'vlc':
-            self._activate_window('vlc')
-        elif player == 'windows_media':
-            self._activate_window('windows media player')
-        
-        commands = {
-            'youtube': lambda: pyautogui.hotkey('shift', 'p'),
-            'spotify': lambda: pyautogui.hotkey('ctrl', 'left'),
-            'vlc': lambda: pyautogui.press('p'),
-            'windows_media': lambda: pyautogui.hotkey('ctrl', 'b')
-        }
-        
-        if player in commands:
-            commands[player]()
-            print(f"PREVIOUS -> {player.upper()}")
-            return True
-        return False
+        if not self.backend.previous_track(player, count):
+            return False
+        print(f"PREVIOUS x{count} -> {player.upper()}" if count > 1 else f"PREVIOUS -> {player.upper()}")
+        return True
     
-    def _next(self, player):
+    def _next(self, player, count=1, magnitude=None):
         """Next track/video"""
-        if player == 'spotify':
-            self._activate_window('spotify')
-        elif player == 'vlc':
-            self._activate_window('vlc')
-        elif player == 'windows_media':
-            self._activate_window('windows media player')
-        
-        commands = {
-            'youtube': lambda: pyautogui.hotkey('shift', 'n'),
-            'spotify': lambda: pyautogui.hotkey('ctrl', 'right'),
-            'vlc': lambda: pyautogui.press('n'),
-            'windows_media': lambda: pyautogui.hotkey('ctrl', 'f')
-        }
-        
-        if player in commands:
-            commands[player]()
-            print(f"NEXT -> {player.upper()}")
-            return True
-        return False
+        if not self.backend.next_track(player, count):
+            return False
+        print(f"NEXT x{count} -> {player.upper()}" if count > 1 else f"NEXT -> {player.upper()}")
+        return True
+    
+    def _volume_delta(self, count, magnitude):
+        """Volume change for a (merged) swipe, proportional to its speed
+        
+        Swipes fire within a few frames of starting, before the stroke's
+        length is known, so a fast flick changes the volume more than a
+        slow one instead.
+        """
+        if magnitude is None:
+            return self.volume_step * count
+        return self.volume_gain * magnitude
     
-    def _volume_up(self):
-        """Increase system volume - Shows OSD bar"""
+    def _volume_up(self, player=None, count=1, magnitude=None):
+        """Increase system volume"""
         
-        pyautogui.press('volumeup')
-        print(f"VOLUME UP")
+        level = self.volume.change(self._volume_delta(count, magnitude))
+        print(f"VOLUME UP -> {int(level * 100)}%")
         return True
     
-    def _volume_down(self):
-        """Decrease system volume - Shows OSD bar"""
+    def _volume_down(self, player=None, count=1, magnitude=None):
+        """Decrease system volume"""
         
-        pyautogui.press('volumedown')
-        print(f"VOLUME DOWN")
+        level = self.volume.change(-self._volume_delta(count, magnitude))
+        print(f"VOLUME DOWN -> {int(level * 100)}%")
         return True
     
     def get_current_volume(self):
         """Get current system volume percentage"""
-        if self.volume_interface:
-            try:
-                volume = self.volume_interface.GetMasterVolumeLevelScalar()
-                return int(volume * 100)
-            except:
-                pass
-        return None
\ No newline at end of file
+        try:
+            return int(self.volume.get_level() * 100)
+        except:
+            pass
+        return None
+    
+    def close(self):
+        """Stop backend threads and connections"""
+        self.backend.close()
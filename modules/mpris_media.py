@@ -0,0 +1,173 @@
+"""
+OKTrix MPRIS Media Backend
+Controls Linux media players directly over D-Bus (MPRIS2)
+"""
+
+import threading
+
+from jeepney import DBusAddress, MessageType, Properties, new_method_call
+from jeepney.bus_messages import message_bus
+from jeepney.io.blocking import open_dbus_connection
+from jeepney.wrappers import DBusErrorResponse
+
+from .media_backend import MediaBackend
+from .volume_control import VolumeBackend
+
+
+MPRIS_PREFIX = 'org.mpris.MediaPlayer2.'
+MPRIS_PATH = '/org/mpris/MediaPlayer2'
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+
+# PlaybackStatus -> preference when choosing a player
+STATUS_RANK = {'Playing': 2, 'Paused': 1}
+
+
+class MprisVolume(VolumeBackend):
+    name = 'mpris'
+
+    def __init__(self, backend):
+        """
+        Volume property of the active player
+
+        Uses the player the backend resolved for the current command, so
+        a volume change costs a Get and a Set, not another bus scan.
+
+        Args:
+            backend: MprisMediaBackend
+        """
+        self.backend = backend
+        self.level = 0.5
+
+    def _player(self):
+        player = self.backend.active_player
+        return player if player is not None else self.backend.detect_player()
+
+    def get_level(self):
+        player = self._player()
+        if player is not None:
+            try:
+                self.level = float(self.backend.get_property(player, 'Volume'))
+            except Exception:
+                pass
+        return self.level
+
+    def set_level(self, level):
+        player = self._player()
+        if player is not None:
+            self.backend.set_property(player, 'Volume', 'd', level)
+        self.level = level
+
+
+class MprisMediaBackend(MediaBackend):
+    name = 'mpris'
+
+    def __init__(self):
+        """
+        Send commands to MPRIS players on the session bus
+
+        Commands are D-Bus method calls on the player itself: no window
+        focus, no synthetic keystrokes, and the real playback state can
+        be read back.
+        """
+        self.connection = open_dbus_connection(bus='SESSION')
+        # The connection is shared by the engine and command threads
+        self._lock = threading.Lock()
+        self.volume = MprisVolume(self)
+        self.last_player = None
+        # Result of the latest detect_player()
+        self.active_player = None
+
+    def _address(self, player):
+        return DBusAddress(MPRIS_PATH, bus_name=MPRIS_PREFIX + player,
+                           interface=PLAYER_INTERFACE)
+
+    def _request(self, message):
+        with self._lock:
+            return self.connection.send_and_get_reply(message, timeout=1.0)
+
+    def _call(self, player, method):
+        """
+        Returns:
+            bool: False if the player answered with a D-Bus error
+        """
+        reply = self._request(new_method_call(self._address(player), method))
+        if reply.header.message_type == MessageType.error:
+            print(f"MPRIS {method} failed on {player}: {DBusErrorResponse(reply)}")
+            return False
+        return True
+
+    def get_property(self, player, name):
+        """
+        Raises:
+            DBusErrorResponse: the player answered with an error
+        """
+        reply = self._request(Properties(self._address(player)).get(name))
+        if reply.header.message_type == MessageType.error:
+            raise DBusErrorResponse(reply)
+        signature, value = reply.body[0]
+        return value
+
+    def set_property(self, player, name, signature, value):
+        """
+        Returns:
+            bool: False if the player answered with a D-Bus error
+        """
+        reply = self._request(Properties(self._address(player)).set(name, signature, value))
+        return reply.header.message_type != MessageType.error
+
+    def list_players(self):
+        """
+        Returns:
+            list of player names ('spotify', 'vlc', 'firefox.instance_1_42', ...)
+        """
+        reply = self._request(message_bus.ListNames())
+        return [name[len(MPRIS_PREFIX):] for name in reply.body[0]
+                if name.startswith(MPRIS_PREFIX)]
+
+    def detect_player(self):
+        """
+        Playing beats paused beats stopped; ties go to the player that was
+        commanded last, then to bus order
+        """
+        best = None
+        best_rank = None
+        for player in self.list_players():
+            try:
+                status = self.get_property(player, 'PlaybackStatus')
+            except Exception:
+                continue
+            rank = (STATUS_RANK.get(status, 0), player == self.last_player)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = player, rank
+        self.active_player = best
+        return best
+
+    def play_pause(self, player):
+        if not self._call(player, 'PlayPause'):
+            return False
+        self.last_player = player
+        return True
+
+    def next_track(self, player, count=1):
+        for _ in range(count):
+            if not self._call(player, 'Next'):
+                return False
+        self.last_player = player
+        return True
+
+    def previous_track(self, player, count=1):
+        for _ in range(count):
+            if not self._call(player, 'Previous'):
+                return False
+        self.last_player = player
+        return True
+
+    def get_playback_state(self, player):
+        try:
+            status = self.get_property(player, 'PlaybackStatus')
+        except Exception:
+            return None
+        return 'PLAYING' if status == 'Playing' else 'PAUSED'
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,193 @@
+"""
+OKTrix Process Watcher
+Keeps a live view of running media players in the background so gesture
+handling never has to scan the process table
+"""
+
+import threading
+import time
+
+import psutil
+
+# Foreground window lookup (Windows only)
+try:
+    import win32gui
+    import win32process
+    FOCUS_API_AVAILABLE = True
+except ImportError:
+    FOCUS_API_AVAILABLE = False
+
+
+# Process name -> player
+PLAYER_PROCESSES = {
+    'spotify.exe': 'spotify',
+    'vlc.exe': 'vlc',
+    'wmplayer.exe': 'windows_media',
+    'chrome.exe': 'youtube',
+    'firefox.exe': 'youtube',
+    'msedge.exe': 'youtube',
+    'opera.exe': 'youtube',
+    'brave.exe': 'youtube'
+}
+
+# Used when no running player has been focused yet
+PLAYER_PRIORITY = ('spotify', 'vlc', 'windows_media', 'youtube')
+
+
+class ProcessWatcher:
+    def __init__(self, interval=1.0, focus_interval=0.25):
+        """
+        Track which media players are running and which was focused last
+
+        A background thread diffs the PID list against the previous poll
+        and only looks up names of new processes, so each poll costs one
+        psutil.pids() call plus a name lookup per started process. The
+        foreground window is sampled more often to learn which player the
+        user touched most recently.
+
+        Args:
+            interval: Seconds between process table polls
+            focus_interval: Seconds between foreground window checks
+        """
+        self.interval = interval
+        self.focus_interval = focus_interval
+
+        # pid -> player, or None for processes we don't care about
+        self._pids = {}
+        # player -> set of pids
+        self._players = {}
+        # player -> time it was last in the foreground
+        self._last_focused = {}
+
+        # Snapshot read by the gesture path without locking
+        self.running_players = frozenset()
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._ready = threading.Event()
+
+        # Counters
+        self.polls = 0
+        self.name_lookups = 0
+
+    def start(self):
+        """
+        Start the watcher thread; the first poll runs right away
+
+        Returns:
+            self, for chaining
+        """
+        if self._thread is not None:
+            return self
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        next_poll = 0.0
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_poll:
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"Process watcher error: {e}")
+                self._ready.set()
+                next_poll = now + self.interval
+
+            if FOCUS_API_AVAILABLE:
+                self._check_focus()
+
+            self._stop_event.wait(self.focus_interval if FOCUS_API_AVAILABLE else self.interval)
+
+    def poll(self):
+        """
+        Apply started and exited processes since the last poll
+        """
+        pids = set(psutil.pids())
+        known = self._pids.keys()
+
+        for pid in known - pids:
+            player = self._pids.pop(pid)
+            if player is not None:
+                self._players[player].discard(pid)
+                if not self._players[player]:
+                    del self._players[player]
+
+        for pid in pids - known:
+            player = None
+            try:
+                self.name_lookups += 1
+                player = PLAYER_PROCESSES.get(psutil.Process(pid).name().lower())
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+            self._pids[pid] = player
+            if player is not None:
+                self._players.setdefault(player, set()).add(pid)
+
+        self.polls += 1
+        self.running_players = frozenset(self._players)
+
+    def _check_focus(self):
+        try:
+            hwnd = win32gui.GetForegroundWindow()
+            if not hwnd:
+                return
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        except Exception:
+            return
+
+        player = self._pids.get(pid)
+        if player is not None:
+            self._last_focused[player] = time.monotonic()
+
+    def wait_ready(self, timeout=None):
+        """
+        Block until the first poll has finished
+
+        Returns:
+            bool: True if ready
+        """
+        return self._ready.wait(timeout)
+
+    def get_active_player(self):
+        """
+        Player to send commands to
+
+        Returns:
+            str: most recently focused running player, else the first
+            running one in PLAYER_PRIORITY order, else None
+        """
+        running = self.running_players
+        if not running:
+            return None
+
+        focused = [(self._last_focused[player], player)
+                   for player in running if player in self._last_focused]
+        if focused:
+            return max(focused)[1]
+
+        for player in PLAYER_PRIORITY:
+            if player in running:
+                return player
+        return None
+
+    def get_stats(self):
+        return {
+            'running_players': sorted(self.running_players),
+            'processes': len(self._pids),
+            'polls': self.polls,
+            'name_lookups': self.name_lookups
+        }
+
+    def stop(self):
+        """
+        Stop the watcher thread
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
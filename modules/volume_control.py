@@ -0,0 +1,101 @@
+"""
+OKTrix Volume Control
+System volume backends: direct endpoint level, keyboard keys, or an
+in-memory mixer for machines without an audio endpoint
+"""
+
+
+class VolumeBackend:
+    """
+    Master volume as a 0.0 - 1.0 level
+    """
+
+    name = 'none'
+
+    def get_level(self):
+        raise NotImplementedError
+
+    def set_level(self, level):
+        raise NotImplementedError
+
+    def change(self, delta):
+        """
+        Move the volume by delta, clamped to 0.0 - 1.0
+
+        Returns:
+            float: new level
+        """
+        level = min(max(self.get_level() + delta, 0.0), 1.0)
+        self.set_level(level)
+        return level
+
+
+class EndpointVolume(VolumeBackend):
+    name = 'endpoint'
+
+    def __init__(self, interface):
+        """
+        Set the level straight through pycaw's IAudioEndpointVolume
+
+        One COM call per change, any step size, no keystrokes.
+
+        Args:
+            interface: IAudioEndpointVolume pointer
+        """
+        self.interface = interface
+
+    def get_level(self):
+        return float(self.interface.GetMasterVolumeLevelScalar())
+
+    def set_level(self, level):
+        self.interface.SetMasterVolumeLevelScalar(level, None)
+
+
+class KeyboardVolume(VolumeBackend):
+    name = 'keyboard'
+
+    def __init__(self, key_step=0.02):
+        """
+        Fallback using volume media keys; the level is only estimated
+
+        Args:
+            key_step: Volume change per key press (Windows moves 2%)
+        """
+        self.key_step = key_step
+        self.level = 0.5
+
+    def get_level(self):
+        return self.level
+
+    def set_level(self, level):
+        self.change(level - self.level)
+
+    def change(self, delta):
+        import pyautogui
+
+        presses = max(1, round(abs(delta) / self.key_step))
+        pyautogui.press('volumeup' if delta > 0 else 'volumedown', presses=presses)
+        step = self.key_step if delta > 0 else -self.key_step
+        self.level = min(max(self.level + presses * step, 0.0), 1.0)
+        return self.level
+
+
+class MemoryVolume(VolumeBackend):
+    name = 'memory'
+
+    def __init__(self, level=0.5):
+        """
+        In-memory mixer for Linux development, replays and benchmarks
+
+        Args:
+            level: Starting level
+        """
+        self.level = level
+        self.changes = 0
+
+    def get_level(self):
+        return self.level
+
+    def set_level(self, level):
+        self.level = level
+        self.changes += 1
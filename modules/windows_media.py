@@ -0,0 +1,214 @@
+"""
+OKTrix Windows Media Backend
+Keyboard shortcuts sent to the player window (YouTube, Spotify, VLC, etc.)
+"""
+
+import functools
+import pyautogui
+import time
+from ctypes import cast, POINTER
+from comtypes import CLSCTX_ALL
+from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+from .media_backend import MediaBackend
+from .process_watcher import ProcessWatcher
+from .volume_control import EndpointVolume, KeyboardVolume
+
+# Windows API
+try:
+    import win32gui
+    import win32con
+    WINDOWS_API_AVAILABLE = True
+except ImportError:
+    WINDOWS_API_AVAILABLE = False
+    print("Warning: pywin32 not available")
+
+
+# Built-in bindings, same format as "players" in config/gestures.json:
+# window title fragment to focus before sending keys (browsers get the
+# keys wherever the focused tab is) and a key spec per action
+DEFAULT_PLAYERS = {
+    'youtube': {'play_pause': 'k', 'previous_track': 'shift+p', 'next_track': 'shift+n'},
+    'spotify': {'window': 'spotify', 'play_pause': 'space',
+                'previous_track': 'ctrl+left', 'next_track': 'ctrl+right'},
+    'vlc': {'window': 'vlc', 'play_pause': 'space', 'previous_track': 'p', 'next_track': 'n'},
+    'windows_media': {'window': 'windows media player', 'play_pause': 'ctrl+p',
+                      'previous_track': 'ctrl+b', 'next_track': 'ctrl+f'}
+}
+
+
+def compile_key(spec):
+    """
+    Turn a key spec ('space', 'ctrl+left') into a callable sending it
+
+    Returns:
+        functools.partial over pyautogui.press or pyautogui.hotkey
+    """
+    keys = [key.strip() for key in spec.lower().split('+') if key.strip()]
+    if not keys:
+        raise ValueError(f"Empty key spec: '{spec}'")
+    if len(keys) == 1:
+        return functools.partial(pyautogui.press, keys[0])
+    return functools.partial(pyautogui.hotkey, *keys)
+
+
+def compile_players(players):
+    """
+    Returns:
+        (windows, keys): player -> window title fragment, and
+        action -> {player: key callable}
+    """
+    windows = {}
+    keys = {'play_pause': {}, 'previous_track': {}, 'next_track': {}}
+    for player, bindings in players.items():
+        for action, spec in bindings.items():
+            if action == 'window':
+                windows[player] = spec.lower()
+            elif action in keys:
+                keys[action][player] = compile_key(spec)
+    return windows, keys
+
+
+class WindowsMediaBackend(MediaBackend):
+    name = 'windows'
+
+    def __init__(self):
+        """Initialize keyboard, window and volume control"""
+        pyautogui.FAILSAFE = False
+        pyautogui.PAUSE = 0.1
+
+        self.volume_interface = self._init_volume_control()
+        if self.volume_interface is not None:
+            self.volume = EndpointVolume(self.volume_interface)
+        else:
+            self.volume = KeyboardVolume()
+
+        # Keeps the set of running players current in the background
+        self.process_watcher = ProcessWatcher().start()
+
+        # Window title fragment -> last matching window handle
+        self.window_cache = {}
+        self.focus_timeout = 0.15
+
+        # (player windows, action -> player -> key sender), swapped as one
+        self.bindings = compile_players(DEFAULT_PLAYERS)
+
+    def apply_config(self, config):
+        """Replace the player bindings with the config's, if it has any"""
+        if config.players:
+            self.bindings = compile_players(config.players)
+
+    def _init_volume_control(self):
+        """Initialize Windows volume control interface"""
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+
+            devices = AudioUtilities.GetSpeakers()
+            interface = devices.Activate(
+                IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            volume = cast(interface, POINTER(IAudioEndpointVolume))
+            return volume
+        except Exception as e:
+            print(f"Warning: Could not initialize volume control: {e}")
+            return None
+
+    def _find_window(self, window_title_contains):
+        """Find a visible window containing title, cached per title
+
+        A cached handle is reused while it still exists and still matches;
+        EnumWindows only runs on a miss.
+        """
+        needle = window_title_contains.lower()
+
+        hwnd = self.window_cache.get(needle)
+        if hwnd and win32gui.IsWindow(hwnd) and win32gui.IsWindowVisible(hwnd):
+            if needle in win32gui.GetWindowText(hwnd).lower():
+                return hwnd
+
+        def callback(hwnd, windows):
+            if win32gui.IsWindowVisible(hwnd):
+                title = win32gui.GetWindowText(hwnd)
+                if needle in title.lower():
+                    windows.append(hwnd)
+            return True
+
+        windows = []
+        win32gui.EnumWindows(callback, windows)
+
+        if windows:
+            self.window_cache[needle] = windows[0]
+            return windows[0]
+
+        self.window_cache.pop(needle, None)
+        return None
+
+    def _wait_for_foreground(self, hwnd):
+        """Poll until hwnd has focus or focus_timeout passes"""
+        deadline = time.perf_counter() + self.focus_timeout
+        while win32gui.GetForegroundWindow() != hwnd:
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _activate_window(self, window_title_contains):
+        """Activate window containing title"""
+        if not WINDOWS_API_AVAILABLE:
+            return False
+
+        hwnd = self._find_window(window_title_contains)
+
+        if hwnd:
+            try:
+                if win32gui.GetForegroundWindow() == hwnd:
+                    return True
+
+                if win32gui.IsIconic(hwnd):
+                    win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+
+                win32gui.SetForegroundWindow(hwnd)
+                # Keys go out as soon as the window has focus
+                self._wait_for_foreground(hwnd)
+                return True
+            except Exception as e:
+                # Handle may have died between the check and the call
+                self.window_cache.pop(window_title_contains.lower(), None)
+                print(f"Error activating window: {e}")
+                return False
+
+        return False
+
+    def _send(self, action, player, count=1):
+        """Focus the player's window and send its shortcut count times"""
+        windows, keys = self.bindings
+        send = keys[action].get(player)
+        if send is None:
+            return False
+
+        if player in windows:
+            self._activate_window(windows[player])
+
+        for _ in range(count):
+            send()
+        return True
+
+    def detect_player(self):
+        """Most recently focused running player, from the process watcher
+
+        Only blocks for a gesture made before the first scan finished.
+        """
+        self.process_watcher.wait_ready(timeout=1.0)
+        return self.process_watcher.get_active_player()
+
+    def play_pause(self, player):
+        return self._send('play_pause', player)
+
+    def next_track(self, player, count=1):
+        return self._send('next_track', player, count)
+
+    def previous_track(self, player, count=1):
+        return self._send('previous_track', player, count)
+
+    def close(self):
+        self.process_watcher.stop()
@@ -1,5 +1,13 @@
 // Dashboard Component 
-function Dashboard({ systemActive, handleToggle, handDetected, activationProgress, displayedGesture, displayedPlayPauseLabel, getGestureName, canvasRef }) {
+function Dashboard({ systemActive, handleToggle, handDetected, activationProgress, displayedGesture, displayedPlayPauseLabel, getGestureName, canvasRef, backendStatus }) {
+    let trackingLabel = 'TRACKING ACTIVE';
+    if (backendStatus && !backendStatus.model) {
+        trackingLabel = 'LOADING MODEL';
+    } else if (backendStatus && !backendStatus.camera) {
+        trackingLabel = 'OPENING CAMERA';
+    }
+
+
     return (
         <>
             {/* Header */}
@@ -58,7 +66,7 @@ function Dashboard({ systemActive, handleToggle, handDetected, activationProgres
 
                 <div className="tracking-status">
                     <div className="status-dot"></div>
-                    <span>TRACKING ACTIVE</span>
+                    <span>{trackingLabel}</span>
                 </div>
             </div>
 
@@ -1,5 +1,58 @@
 const { useState, useEffect, useRef } = React;
 
+// Hand skeleton, same topology as the backend preview
+const HAND_CONNECTIONS = [
+    [0,1],[1,2],[2,3],[3,4], [0,5],[5,6],[6,7],[7,8],
+    [0,9],[9,10],[10,11],[11,12], [0,13],[13,14],[14,15],[15,16],
+    [0,17],[17,18],[18,19],[19,20], [5,9],[9,13],[13,17]
+];
+const MINT = [125, 211, 192];
+
+function mint(alpha) {
+    return `rgb(${MINT.map(c => Math.round(c * alpha / 255)).join(',')})`;
+}
+
+// Draw packed float32 (x, y) landmarks with the mint glow look,
+// 21 points (42 floats) per hand
+function drawSkeleton(canvas, packed) {
+    const ctx = canvas.getContext('2d');
+    const w = canvas.width;
+    const h = canvas.height;
+
+    ctx.fillStyle = '#000';
+    ctx.fillRect(0, 0, w, h);
+
+    if (!packed) return;
+
+    const all = new Float32Array(packed);
+    ctx.lineCap = 'round';
+
+    for (let offset = 0; offset + 42 <= all.length; offset += 42) {
+        const pts = all.subarray(offset, offset + 42);
+
+        for (const [thick, alpha] of [[8,30], [5,60], [3,120], [2,255]]) {
+            ctx.strokeStyle = mint(alpha);
+            ctx.lineWidth = thick;
+            ctx.beginPath();
+            for (const [s, e] of HAND_CONNECTIONS) {
+                ctx.moveTo(pts[s*2] * w, pts[s*2+1] * h);
+                ctx.lineTo(pts[e*2] * w, pts[e*2+1] * h);
+            }
+            ctx.stroke();
+        }
+
+        for (let i = 0; i < 21; i++) {
+            const r = i === 0 ? 8 : 5;
+            for (const [radius, alpha] of [[r*3,20], [r*2,40], [r,255]]) {
+                ctx.fillStyle = mint(alpha);
+                ctx.beginPath();
+                ctx.arc(pts[i*2] * w, pts[i*2+1] * h, radius, 0, Math.PI * 2);
+                ctx.fill();
+            }
+        }
+    }
+}
+
 
 function App() {
     // Page routing
@@ -12,6 +65,7 @@ function App() {
     const [displayedPlayPauseLabel, setDisplayedPlayPauseLabel] = useState(null);
     const [handDetected, setHandDetected] = useState(false);
     const [activationProgress, setActivationProgress] = useState(0);
+    const [backendStatus, setBackendStatus] = useState({ server: true, model: false, camera: false });
     const canvasRef = useRef(null);
     const gestureTimeoutRef = useRef(null);
 
@@ -22,6 +76,7 @@ function App() {
 
                 newSocket.on('connect', () => {
                     console.log('✅ Connected');
+                    newSocket.emit('set_stream_mode', { mode: 'landmarks' });
                     newSocket.emit('start_tracking');
                 });
 
@@ -49,7 +104,9 @@ function App() {
                         }
                     }
 
-                    if (data.tracking_frame && canvasRef.current) {
+                    if ('landmarks' in data && canvasRef.current) {
+                        drawSkeleton(canvasRef.current, data.landmarks);
+                    } else if (data.tracking_frame && canvasRef.current) {
                         const img = new Image();
                         img.onload = () => {
                             const ctx = canvasRef.current.getContext('2d');
@@ -59,6 +116,25 @@ function App() {
                     }
                 });
 
+                // Startup phases: server up, model loaded, camera open
+                newSocket.on('backend_status', (status) => {
+                    setBackendStatus(status);
+                });
+
+                // Sent once when the hand goes away instead of black frames
+                newSocket.on('hand_status', (data) => {
+                    setHandDetected(data.hand_detected);
+                    setActivationProgress(data.activation_progress || 0);
+
+                    if (data.system_active !== undefined) {
+                        setSystemActive(data.system_active);
+                    }
+
+                    if (canvasRef.current) {
+                        drawSkeleton(canvasRef.current, null);
+                    }
+                });
+
                 setSocket(newSocket);
             });
 
@@ -110,6 +186,7 @@ function App() {
                     displayedPlayPauseLabel={displayedPlayPauseLabel}
                     getGestureName={getGestureName}
                     canvasRef={canvasRef}
+                    backendStatus={backendStatus}
                 />;
             case 'modules':
                 return <Modules onNavigate={setCurrentPage} />;
@@ -129,6 +206,7 @@ function App() {
                     displayedPlayPauseLabel={displayedPlayPauseLabel}
                     getGestureName={getGestureName}
                     canvasRef={canvasRef}
+                    backendStatus={backendStatus}
                 />;
         }
     }